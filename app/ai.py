@@ -1,18 +1,26 @@
+import asyncio
+import functools
+import hashlib
 import os
 
-from dotenv import load_dotenv
-from openai import OpenAI
-
+from app.cache import SqliteStore, TTLCache
+from app.constants import LLM_BASE_URL, LLM_CACHE_PATH, LLM_CACHE_SIZE, LLM_CACHE_TTL, RULES_FAST_PATH
+from app.metrics import timed
 from app.models import Filters
+from app.rules import rule_parser
 
 
-load_dotenv()
-
+@functools.cache
+def get_client():
+    # Built on the first LLM call, importing openai alone costs more than the rest of the app
+    from dotenv import load_dotenv
+    from openai import AsyncOpenAI
 
-client = OpenAI(
-  base_url="https://openrouter.ai/api/v1",
-  api_key=os.getenv("OPENROUTER_KEY"),
-)
+    load_dotenv()
+    return AsyncOpenAI(
+      base_url=LLM_BASE_URL,
+      api_key=os.getenv("OPENROUTER_KEY"),
+    )
 
 
 PROMPT = """
@@ -22,12 +30,51 @@ Like if it asks 'Give me sofas names JENNY', then product_name must be 'sofas JE
 As for material, shape, style, textile, delivery and pattern please look into Enums and match values to those
 enums. If color provided pattern must stay None.
 If user asks for a floor set is_floors_search to true
+If user asks for a kind of furniture or lamp, set category to the matching category
 """
 
+MODEL = "google/gemini-flash-1.5"
+PROMPT_HASH = hashlib.sha256(PROMPT.encode()).hexdigest()[:16]
+
+
+filters_cache = TTLCache(
+    maxsize=LLM_CACHE_SIZE,
+    ttl=LLM_CACHE_TTL,
+    store=SqliteStore(LLM_CACHE_PATH, table="filters") if LLM_CACHE_PATH else None,
+    dumps=lambda filters: filters.model_dump_json(),
+    loads=Filters.model_validate_json,
+)
+
+
+def _cache_key(sentence: str) -> str:
+    normalized = " ".join(sentence.lower().split())
+    return hashlib.sha256(f"{MODEL}\n{PROMPT_HASH}\n{normalized}".encode()).hexdigest()
+
+
+@timed("get_filters_from_sentence")
+async def get_filters_from_sentence(sentence: str) -> Filters:
+    # Simple sentences are understood locally, the LLM only sees what the rules cannot cover
+    if RULES_FAST_PATH:
+        filters = rule_parser.parse(sentence)
+        if filters is not None:
+            return filters
+
+    key = _cache_key(sentence)
+
+    # The SQLite tier is read and written off the event loop
+    filters = await filters_cache.aget(key)
+    if filters is None:
+        filters = await _ask_llm(sentence)
+        await filters_cache.aset(key, filters)
+
+    # Callers may modify the filters, the cached instance must stay untouched
+    return filters.model_copy()
+
 
-def get_filters_from_sentence(sentence: str) -> Filters:
-    completion = client.beta.chat.completions.parse(
-        model="google/gemini-flash-1.5",
+@timed("llm")
+async def _ask_llm(sentence: str) -> Filters:
+    completion = await get_client().beta.chat.completions.parse(
+        model=MODEL,
         messages=[
             {"role": "system","content": PROMPT},
             {"role": "user", "content": sentence},
@@ -45,5 +92,5 @@ def get_filters_from_sentence(sentence: str) -> Filters:
 
 if __name__ == '__main__':
     sentence = "Give sofas from JENNY with width 1.6 meters white color"
-    filters = get_filters_from_sentence(sentence)
+    filters = asyncio.run(get_filters_from_sentence(sentence))
     print(filters)
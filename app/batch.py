@@ -0,0 +1,103 @@
+import asyncio
+import logging
+
+from app.ai import get_filters_from_sentence
+from app.constants import BATCH_CONCURRENCY
+from app.connectors import Listing
+from app.extractions import apply_details, get_product_details, get_product_listing
+from app.metrics import timed
+from app.models import BatchResult, Filters, Product
+from app.pagination import next_cursor
+
+
+logger = logging.getLogger(__name__)
+
+
+@timed("search_batch")
+async def search_batch(
+    sentences: list[str],
+    limit: int = 10,
+    offset: int = 0,
+    fields: list[str] | None = None,
+    concurrency: int = BATCH_CONCURRENCY,
+) -> list[BatchResult]:
+    """Search many sentences at once, results come back in input order.
+
+    Identical sentences are understood once, identical filters are listed once and every
+    product url is enriched once for the whole batch. All of that work shares a budget of
+    `concurrency` tasks. A sentence that fails gets an error instead of products.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(operation):
+        async with semaphore:
+            return await operation
+
+    # Sentence -> filters, once per distinct sentence
+    distinct_sentences = list(dict.fromkeys(sentences))
+    resolved = await asyncio.gather(
+        *(bounded(get_filters_from_sentence(sentence)) for sentence in distinct_sentences),
+        return_exceptions=True,
+    )
+    filters_by_sentence: dict[str, Filters | BaseException] = dict(zip(distinct_sentences, resolved))
+
+    # Filters -> listing, once per distinct filters
+    distinct_filters: dict[str, Filters] = {}
+    for filters in filters_by_sentence.values():
+        if isinstance(filters, Filters):
+            distinct_filters.setdefault(filters.model_dump_json(), filters)
+
+    listed = await asyncio.gather(
+        *(bounded(get_product_listing(filters, limit, offset)) for filters in distinct_filters.values()),
+        return_exceptions=True,
+    )
+    listings: dict[str, Listing | BaseException] = dict(zip(distinct_filters, listed))
+
+    # Product url -> details, once per distinct url over all listings
+    urls = list(dict.fromkeys(
+        listing[0][index].product_url
+        for listing in listings.values()
+        if not isinstance(listing, BaseException) and (fields is None or fields)
+        for index in listing[1]
+    ))
+    fetched = await asyncio.gather(
+        *(bounded(get_product_details(url, fields)) for url in urls),
+        return_exceptions=True,
+    )
+    details_by_url = {
+        url: None if isinstance(details, BaseException) else details for url, details in zip(urls, fetched)
+    }
+    logger.info(
+        "Batch of %s sentences: %s distinct, %s listings, %s detail pages",
+        len(sentences), len(distinct_sentences), len(distinct_filters), len(urls),
+    )
+
+    results = []
+    for sentence in sentences:
+        filters = filters_by_sentence[sentence]
+        if isinstance(filters, BaseException):
+            results.append(BatchResult(sentence=sentence, error=f"Could not understand the sentence: {filters}"))
+            continue
+
+        listing = listings[filters.model_dump_json()]
+        if isinstance(listing, BaseException):
+            results.append(BatchResult(sentence=sentence, error=f"Could not list products: {listing}"))
+            continue
+
+        # Every result gets its own copies, the same listing may back several sentences
+        products, pending, degraded = listing
+        products = [product.model_copy(deep=True) for product in products]
+        for index in pending:
+            if fields is not None and not fields:
+                products[index].enrichment = "skipped"
+            else:
+                apply_details(products[index], details_by_url[products[index].product_url], fields)
+
+        results.append(BatchResult(
+            sentence=sentence,
+            products=products,
+            next_cursor=next_cursor(filters, limit, offset, len(products)),
+            degraded=degraded,
+        ))
+
+    return results
@@ -0,0 +1,282 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+
+from app.constants import (
+    BROWSER_BLOCK_HOSTS,
+    BROWSER_BLOCK_RESOURCES,
+    BROWSER_MAX_PAGES,
+    BROWSER_POOL_SIZE,
+    BROWSER_READY_TIMEOUT,
+    BROWSER_RECYCLE_AFTER,
+    BROWSER_WAIT_UNTIL,
+    HEADERS,
+)
+from app.metrics import BLOCKED_REQUESTS, RECEIVED_BYTES, RESOURCE_POLICY, timed
+
+# Playwright is imported when the first browser starts, processes that never render do not load it
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, Page, Playwright, Response, Route
+
+
+logger = logging.getLogger(__name__)
+
+
+class ResourcePolicy:
+    """Aborts the requests of a page that are not needed to read its HTML.
+
+    Requests are blocked by Playwright resource type (image, font, ...) or when their host is
+    one of `hosts` or a subdomain of it, which covers analytics and trackers.
+    """
+
+    def __init__(self, resource_types=(), hosts=()):
+        self.resource_types = frozenset(resource_types)
+        self.hosts = tuple(hosts)
+
+        self.blocked = 0
+        self.allowed = 0
+        self.received_bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.resource_types or self.hosts)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if resource_type in self.resource_types:
+            return True
+        host = urlsplit(url).hostname or ""
+        return any(host == blocked or host.endswith("." + blocked) for blocked in self.hosts)
+
+    async def handle(self, route: "Route"):
+        request = route.request
+        try:
+            if self.should_block(request.resource_type, request.url):
+                self.blocked += 1
+                BLOCKED_REQUESTS.labels(request.resource_type).inc()
+                await route.abort()
+            else:
+                self.allowed += 1
+                await route.continue_()
+        except Exception as e:
+            # The page may be closed while its requests are still being routed
+            logger.debug("Could not route %s: %s", request.url, e)
+
+    def on_response(self, response: "Response"):
+        length = response.headers.get("content-length", "")
+        if length.isdigit():
+            self.received_bytes += int(length)
+            RECEIVED_BYTES.inc(int(length))
+
+    def stats(self) -> dict:
+        return {
+            "blocked_requests": self.blocked,
+            "allowed_requests": self.allowed,
+            "received_bytes": self.received_bytes,
+        }
+
+
+async def navigate(page: "Page", url: str, ready_selector: str | None = None) -> "Response | None":
+    """Open `url` and wait until it is usable instead of waiting for the network to go idle.
+
+    With a `ready_selector` the page counts as ready once that element is attached. Set
+    BROWSER_WAIT_UNTIL=networkidle to get the old, slower behaviour back.
+    """
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+    if BROWSER_WAIT_UNTIL == "networkidle":
+        return await page.goto(url, wait_until="networkidle")
+
+    response = await page.goto(url, wait_until=BROWSER_WAIT_UNTIL)
+    if ready_selector and response is not None and response.status == 200:
+        try:
+            await page.wait_for_selector(ready_selector, state="attached", timeout=BROWSER_READY_TIMEOUT * 1000)
+        except PlaywrightTimeoutError:
+            logger.warning("%s did not show %r within %s s", url, ready_selector, BROWSER_READY_TIMEOUT)
+    return response
+
+
+class _Slot:
+    def __init__(self):
+        self.browser: "Browser | None" = None
+        self.served = 0
+
+
+class BrowserPool:
+    """Long-lived Chromium instances shared by every request.
+
+    Pages are handed out through `page()`, each in its own context, and at most `max_pages`
+    of them are open at the same time. A browser is relaunched when it crashed or after it
+    served `recycle_after` pages, so leaks in Chromium do not pile up over the pod lifetime.
+    """
+
+    def __init__(
+        self,
+        size: int = 1,
+        max_pages: int = 4,
+        recycle_after: int = 200,
+        resource_policy: ResourcePolicy | None = None,
+    ):
+        self.size = size
+        self.max_pages = max_pages
+        self.recycle_after = recycle_after
+        self.resource_policy = resource_policy or ResourcePolicy()
+
+        self._playwright: "Playwright | None" = None
+        self._slots = [_Slot() for _ in range(size)]
+        self._active: dict["Browser", int] = {}
+        self._retired: set["Browser"] = set()
+        self._semaphore = asyncio.Semaphore(max_pages)
+        self._lock = asyncio.Lock()
+
+        self.in_use = 0
+        self.waiting = 0
+        self.launch_count = 0
+        self.recycle_count = 0
+        self.crash_count = 0
+
+    @property
+    def started(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self):
+        async with self._lock:
+            if self._playwright is not None:
+                return
+            from playwright.async_api import async_playwright
+
+            self._playwright = await async_playwright().start()
+            for slot in self._slots:
+                slot.browser = await self._launch()
+
+    async def close(self):
+        async with self._lock:
+            if self._playwright is None:
+                return
+            browsers = [slot.browser for slot in self._slots if slot.browser] + list(self._retired)
+            for browser in browsers:
+                await self._close_browser(browser)
+            for slot in self._slots:
+                slot.browser = None
+                slot.served = 0
+            self._active.clear()
+            self._retired.clear()
+            await self._playwright.stop()
+            self._playwright = None
+
+    @asynccontextmanager
+    async def page(self):
+        """Lease a fresh page with the home24 headers and German locale set"""
+        if not self.started:
+            await self.start()
+
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_use += 1
+        browser = None
+        context = None
+        try:
+            browser = await self._acquire_browser()
+            context = await browser.new_context(locale="de-DE", extra_http_headers=HEADERS)
+            if self.resource_policy.enabled:
+                await context.route("**/*", self.resource_policy.handle)
+            context.on("response", self.resource_policy.on_response)
+            page: "Page" = await context.new_page()
+            yield page
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.warning("Failed to close browser context: %s", e)
+            if browser is not None:
+                await self._release_browser(browser)
+            self.in_use -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "max_pages": self.max_pages,
+            "in_use": self.in_use,
+            "waiting": self.waiting,
+            "launch_count": self.launch_count,
+            "recycle_count": self.recycle_count,
+            "crash_count": self.crash_count,
+            "connected_browsers": sum(1 for slot in self._slots if slot.browser and slot.browser.is_connected()),
+            **self.resource_policy.stats(),
+        }
+
+    @timed("browser_launch")
+    async def _launch(self) -> "Browser":
+        browser = await self._playwright.chromium.launch()
+        self.launch_count += 1
+        self._active[browser] = 0
+        logger.info("Launched chromium (launch #%s)", self.launch_count)
+        return browser
+
+    async def _acquire_browser(self) -> "Browser":
+        async with self._lock:
+            slot = min(self._slots, key=lambda s: self._active.get(s.browser, 0))
+
+            if slot.browser is None or not slot.browser.is_connected():
+                if slot.browser is not None:
+                    self.crash_count += 1
+                    logger.warning("Chromium disconnected, relaunching")
+                    self._active.pop(slot.browser, None)
+                slot.browser = await self._launch()
+                slot.served = 0
+            elif slot.served >= self.recycle_after:
+                self.recycle_count += 1
+                logger.info("Recycling chromium after %s pages", slot.served)
+                await self._retire(slot.browser)
+                slot.browser = await self._launch()
+                slot.served = 0
+
+            slot.served += 1
+            self._active[slot.browser] += 1
+            return slot.browser
+
+    async def _release_browser(self, browser: "Browser"):
+        async with self._lock:
+            if browser not in self._active:
+                return
+            self._active[browser] -= 1
+            if browser in self._retired and self._active[browser] == 0:
+                await self._retire(browser)
+
+    async def _retire(self, browser: "Browser"):
+        # Browsers that still serve pages are closed once their last page is released
+        if self._active.get(browser, 0) > 0:
+            self._retired.add(browser)
+            return
+        self._retired.discard(browser)
+        self._active.pop(browser, None)
+        await self._close_browser(browser)
+
+    @staticmethod
+    async def _close_browser(browser: "Browser"):
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.warning("Failed to close chromium: %s", e)
+
+
+browser_pool = BrowserPool(
+    size=BROWSER_POOL_SIZE,
+    max_pages=BROWSER_MAX_PAGES,
+    recycle_after=BROWSER_RECYCLE_AFTER,
+    resource_policy=ResourcePolicy(BROWSER_BLOCK_RESOURCES, BROWSER_BLOCK_HOSTS),
+)
+
+RESOURCE_POLICY.info({
+    "blocked_resource_types": ",".join(sorted(BROWSER_BLOCK_RESOURCES)),
+    "blocked_hosts": str(len(BROWSER_BLOCK_HOSTS)),
+    "wait_until": BROWSER_WAIT_UNTIL,
+    "ready_timeout": str(BROWSER_READY_TIMEOUT),
+})
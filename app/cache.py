@@ -0,0 +1,158 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+
+class SqliteStore:
+    """Key/value table in a local SQLite file, values are stored as text"""
+
+    def __init__(self, path: str, table: str = "cache"):
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> tuple[str, float] | None:
+        with self._lock:
+            row = self._conn.execute(f"SELECT value, stored_at FROM {self.table} WHERE key = ?", (key,)).fetchone()
+        return row
+
+    def set(self, key: str, value: str, stored_at: float | None = None):
+        stored_at = time.time() if stored_at is None else stored_at
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, value, stored_at),
+            )
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TTLCache:
+    """Bounded LRU cache where every entry expires `ttl` seconds after it was stored.
+
+    With a `store` the cache gets a second, persistent tier: writes go to both tiers and
+    memory misses are looked up in the store and promoted. `dumps`/`loads` convert values
+    to and from the text kept in the store. Code on the event loop uses `aget`/`aset`, which
+    only leave the loop for the store.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 3600,
+        store: SqliteStore | None = None,
+        dumps: Callable[[Any], str] = json.dumps,
+        loads: Callable[[str], Any] = json.loads,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.store = store
+        self.dumps = dumps
+        self.loads = loads
+        self._data: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_entry(self, key: str) -> tuple[Any, float] | None:
+        """Return the value together with its age in seconds, or None if missing or expired"""
+        now = time.time()
+        entry = self._memory_entry(key, now)
+        if entry is None and self.store is not None:
+            entry = self._store_entry(key, self.store.get(key), now)
+        if entry is None:
+            self.misses += 1
+        return entry
+
+    def get(self, key: str, default=None):
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key: str, value: Any):
+        stored_at = time.time()
+        self._put(key, value, stored_at)
+        if self.store is not None:
+            self.store.set(key, self.dumps(value), stored_at)
+
+    async def aget_entry(self, key: str) -> tuple[Any, float] | None:
+        """get_entry for the event loop, the store is read in a worker thread"""
+        now = time.time()
+        entry = self._memory_entry(key, now)
+        if entry is None and self.store is not None:
+            entry = self._store_entry(key, await asyncio.to_thread(self.store.get, key), now)
+        if entry is None:
+            self.misses += 1
+        return entry
+
+    async def aget(self, key: str, default=None):
+        entry = await self.aget_entry(key)
+        return default if entry is None else entry[0]
+
+    async def aset(self, key: str, value: Any):
+        """set for the event loop, the store is written in a worker thread"""
+        stored_at = time.time()
+        self._put(key, value, stored_at)
+        if self.store is not None:
+            await asyncio.to_thread(self.store.set, key, self.dumps(value), stored_at)
+
+    def delete(self, key: str):
+        self._data.pop(key, None)
+        if self.store is not None:
+            self.store.delete(key)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.store_hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.store_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+    def _memory_entry(self, key: str, now: float) -> tuple[Any, float] | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, stored_at = entry
+        if now - stored_at >= self.ttl:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value, now - stored_at
+
+    def _store_entry(self, key: str, row: tuple[str, float] | None, now: float) -> tuple[Any, float] | None:
+        """Promote a store row that has not expired yet into memory"""
+        if row is None or now - row[1] >= self.ttl:
+            return None
+        value = self.loads(row[0])
+        self._put(key, value, row[1])
+        self.store_hits += 1
+        return value, now - row[1]
+
+    def _put(self, key: str, value: Any, stored_at: float):
+        self._data[key] = (value, stored_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+
+from app.categories import DEFAULT_CATEGORY
+from app.connectors import Connector
+from app.constants import CATALOG_DEADLINE, CATALOG_ENABLED, CATALOG_MAX_AGE, CATALOG_PATH
+from app.models import Filters, Product
+from app.rules import COLORS
+
+
+logger = logging.getLogger(__name__)
+
+
+# Filters.material values and the words home24 uses for them on detail pages
+MATERIAL_TERMS = {
+    "bamboo": ("bambus",),
+    "metal": ("metall",),
+    "plastic": ("kunststoff",),
+    "realleather": ("echtleder",),
+    "solidwood": ("massivholz",),
+    "syntheticleather": ("kunstleder",),
+    "textile": ("textil", "stoff"),
+}
+
+# Filters that need data the listing and detail pages do not give us, these stay live searches
+UNSUPPORTED_FIELDS = (
+    "product_name", "diameter_min", "diameter_max", "shape", "style", "textile", "pattern",
+    "storage_space_beds", "sort_by_discount", "new_ones_first", "is_floors_search",
+)
+
+INDEXED_COLUMNS = ("price_eur", "width", "height", "depth", "rating", "brand", "color_key", "material")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS products (
+    product_url TEXT PRIMARY KEY,
+    category_key TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    price_eur REAL NOT NULL,
+    rating REAL,
+    brand TEXT,
+    width REAL,
+    height REAL,
+    depth REAL,
+    color_key TEXT,
+    material TEXT,
+    data TEXT NOT NULL,
+    crawled_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS categories (
+    category_key TEXT PRIMARY KEY,
+    products INTEGER NOT NULL,
+    crawled_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS products_category_rank ON products (category_key, rank);
+{"".join(f"CREATE INDEX IF NOT EXISTS products_{column} ON products (category_key, {column});" for column in INDEXED_COLUMNS)}
+"""
+
+_COLOR_ALIASES = sorted(COLORS, key=len, reverse=True)
+
+
+def color_key(color: str | None) -> str | None:
+    """Map a shop colour such as "Hellgrau" to the Filters.color value, here "grey" """
+    if not color:
+        return None
+    color = color.lower()
+    for alias in _COLOR_ALIASES:
+        if alias in color:
+            return COLORS[alias]
+    return None
+
+
+class ProductCatalog:
+    """Local SQLite index of crawled products, searched with the same Filters as the live listing.
+
+    A category is only searched while its last complete crawl is younger than `max_age`,
+    everything else returns None so the caller falls back to live scraping.
+    """
+
+    def __init__(self, path: str, max_age: float = 24 * 60 * 60, enabled: bool = False):
+        self.path = path
+        self.max_age = max_age
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+        self.hits = 0
+        self.misses = 0
+
+        if enabled:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    def upsert(self, category: str, products: list[Product], start_rank: int = 0):
+        if self._conn is None:
+            return
+
+        now = time.time()
+        rows = [
+            (
+                product.product_url,
+                category,
+                start_rank + index,
+                product.price_eur,
+                product.rating,
+                product.brand,
+                product.dimensions.width if product.dimensions else None,
+                product.dimensions.height if product.dimensions else None,
+                product.dimensions.depth if product.dimensions else None,
+                color_key(product.color),
+                product.material.lower() if product.material else None,
+                product.model_dump_json(),
+                now,
+            )
+            for index, product in enumerate(products)
+        ]
+        with self._lock:
+            self._conn.executemany(f"INSERT OR REPLACE INTO products VALUES ({', '.join('?' * 13)})", rows)
+
+    def mark_crawled(self, category: str, crawl_started: float):
+        """Record a complete crawl and drop the products it did not see anymore"""
+        if self._conn is None:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM products WHERE category_key = ? AND crawled_at < ?", (category, crawl_started)
+            )
+            count = self._conn.execute(
+                "SELECT COUNT(*) FROM products WHERE category_key = ?", (category,)
+            ).fetchone()[0]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO categories VALUES (?, ?, ?)", (category, count, time.time())
+            )
+
+    def mark_incomplete(self, category: str):
+        """Stop answering for a category whose crawl could not list all of it"""
+        if self._conn is None:
+            return
+
+        with self._lock:
+            self._conn.execute("DELETE FROM categories WHERE category_key = ?", (category,))
+
+    def is_fresh(self, category: str) -> bool:
+        if self._conn is None:
+            return False
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT crawled_at FROM categories WHERE category_key = ?", (category,)
+            ).fetchone()
+        return row is not None and time.time() - row[0] < self.max_age
+
+    def search(self, filters: Filters, limit: int = 10, offset: int = 0) -> list[Product] | None:
+        """Products matching `filters` in listing order, None when the catalog cannot answer"""
+        category = filters.category or DEFAULT_CATEGORY
+        query = self._build_query(filters, category)
+        if query is None or not self.is_fresh(category):
+            self.misses += 1
+            return None
+
+        sql, params = query
+        with self._lock:
+            rows = self._conn.execute(f"{sql} LIMIT ? OFFSET ?", (*params, limit, offset)).fetchall()
+
+        self.hits += 1
+        return [Product.model_validate_json(row[0]) for row in rows]
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
+
+    def stats(self) -> dict:
+        stats = {"enabled": int(self.enabled), "hits": self.hits, "misses": self.misses, "products": 0, "fresh_categories": 0}
+        if self._conn is None:
+            return stats
+
+        with self._lock:
+            stats["products"] = self._conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+            stats["fresh_categories"] = self._conn.execute(
+                "SELECT COUNT(*) FROM categories WHERE crawled_at > ?", (time.time() - self.max_age,)
+            ).fetchone()[0]
+        return stats
+
+    def _build_query(self, filters: Filters, category: str) -> tuple[str, list] | None:
+        if any(getattr(filters, field) for field in UNSUPPORTED_FIELDS):
+            return None
+        if filters.material and filters.material not in MATERIAL_TERMS:
+            return None
+
+        where = ["category_key = ?"]
+        params: list = [category]
+
+        for column, low, high in (
+            ("width", filters.width_min, filters.width_max),
+            ("depth", filters.depth_min, filters.depth_max),
+            ("height", filters.height_min, filters.height_max),
+            ("price_eur", filters.price_min, filters.price_max),
+        ):
+            if low:
+                where.append(f"{column} >= ?")
+                params.append(low)
+            if high:
+                where.append(f"{column} <= ?")
+                params.append(high)
+
+        if filters.average_rating:
+            where.append("rating >= ?")
+            params.append(filters.average_rating)
+
+        if filters.color:
+            where.append("color_key = ?")
+            params.append(filters.color)
+
+        if filters.material:
+            terms = MATERIAL_TERMS[filters.material]
+            where.append("(" + " OR ".join("material LIKE ?" for _ in terms) + ")")
+            params.extend(f"%{term}%" for term in terms)
+
+        # The same precedence as Filters.to_query_params, the crawl order is the shop's relevance
+        if filters.prices_low_to_high:
+            order = "price_eur ASC, rank"
+        elif filters.prices_high_to_low:
+            order = "price_eur DESC, rank"
+        elif filters.sort_by_rating:
+            order = "rating DESC, rank"
+        else:
+            order = "rank"
+
+        return f"SELECT data FROM products WHERE {' AND '.join(where)} ORDER BY {order}", params
+
+
+class CatalogConnector(Connector):
+    """home24 products from the local catalog, defers to the live listing when it cannot answer"""
+
+    name = "catalog"
+    source = "home24"
+
+    def __init__(self, catalog: ProductCatalog, deadline: float):
+        self.catalog = catalog
+        self.deadline = deadline
+
+    def can_serve(self, filters: Filters) -> bool:
+        return self.catalog.enabled and not filters.is_floors_search
+
+    async def search(self, filters: Filters, limit: int, offset: int) -> tuple[list[Product], bool] | None:
+        # Crawled products already carry their detail fields, sqlite3 blocks so it runs off the event loop
+        products = await asyncio.to_thread(self.catalog.search, filters, limit, offset)
+        return None if products is None else (products, False)
+
+
+catalog = ProductCatalog(CATALOG_PATH, max_age=CATALOG_MAX_AGE, enabled=CATALOG_ENABLED)
+catalog_connector = CatalogConnector(catalog, deadline=CATALOG_DEADLINE)
@@ -0,0 +1,108 @@
+import json
+import logging
+import os
+import re
+import time
+
+from app.constants import CATEGORIES_PATH, CATEGORIES_RELOAD_INTERVAL, CATEGORY_TO_ID
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_CATEGORY = "sofa-couch"
+
+_WORD = re.compile(r"[^\W_]+(?:[&'-][^\W_]+)*|&")
+
+
+def normalize(term: str) -> str:
+    return " ".join(term.lower().split())
+
+
+class CategoryResolver:
+    """Maps category names and their German and English synonyms to home24 category keys.
+
+    The table is a JSON file of {key: {"id": ..., "synonyms": [...]}} on top of CATEGORY_TO_ID.
+    Lookups are plain dict reads, the file is checked for changes at most every
+    `reload_interval` seconds and swapped in as a whole.
+    """
+
+    def __init__(self, path: str, reload_interval: float = 60):
+        self.path = path
+        self.reload_interval = reload_interval
+        self._ids: dict[str, str] = dict(CATEGORY_TO_ID)
+        self._synonyms: dict[str, str] = {key: key for key in CATEGORY_TO_ID}
+        self._max_words = 1
+        self._mtime: float | None = None
+        self._checked_at = 0.0
+        self.reload()
+
+    @property
+    def keys(self) -> list[str]:
+        self._maybe_reload()
+        return list(self._ids)
+
+    def resolve(self, term: str | None) -> str | None:
+        """Category key of a key, name or synonym, None when it is unknown"""
+        if not term:
+            return None
+        self._maybe_reload()
+        return self._synonyms.get(normalize(term))
+
+    def category_id(self, key: str) -> str:
+        self._maybe_reload()
+        return self._ids[key]
+
+    def find(self, text: str) -> list[tuple[int, int, str]]:
+        """(start, end, key) of every synonym in `text`, longest match first, without overlaps"""
+        self._maybe_reload()
+        words = [(match.start(), match.end(), match.group(0).lower()) for match in _WORD.finditer(text)]
+        found = []
+
+        index = 0
+        while index < len(words):
+            for size in range(min(self._max_words, len(words) - index), 0, -1):
+                phrase = " ".join(word for _, _, word in words[index:index + size])
+                key = self._synonyms.get(phrase)
+                if key is not None:
+                    found.append((words[index][0], words[index + size - 1][1], key))
+                    index += size
+                    break
+            else:
+                index += 1
+
+        return found
+
+    def reload(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+            if mtime == self._mtime:
+                return
+            with open(self.path, encoding="utf-8") as file:
+                table = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("Could not load categories from %s: %s", self.path, e)
+            return
+
+        ids = dict(CATEGORY_TO_ID)
+        synonyms = {key: key for key in CATEGORY_TO_ID}
+        for key, entry in table.items():
+            ids[key] = str(entry.get("id", ids.get(key, "")))
+            synonyms[normalize(key)] = key
+            for synonym in entry.get("synonyms", ()):
+                synonyms[normalize(synonym)] = key
+
+        self._ids = {key: value for key, value in ids.items() if value}
+        self._synonyms = {synonym: key for synonym, key in synonyms.items() if key in self._ids}
+        self._max_words = max(len(synonym.split()) for synonym in self._synonyms)
+        self._mtime = mtime
+        logger.info("Loaded %s categories with %s synonyms", len(self._ids), len(self._synonyms))
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at >= self.reload_interval:
+            self._checked_at = now
+            self.reload()
+
+
+category_resolver = CategoryResolver(CATEGORIES_PATH, reload_interval=CATEGORIES_RELOAD_INTERVAL)
@@ -0,0 +1,97 @@
+from dataclasses import dataclass, fields as dataclass_fields
+
+from pydantic import TypeAdapter
+
+from app.models import BatchResult, Dimensions, Product
+
+
+@dataclass(slots=True)
+class ProductRecord:
+    """Flat form in which the listing cache keeps the parsed products between requests.
+
+    Requests work on the Products they get from `to_product`, which skips validation since
+    the record was built from data that was already parsed.
+    """
+    name: str
+    image_url: str
+    price_eur: float
+    product_url: str
+    brand: str
+    rating: float
+    width: float | None = None
+    height: float | None = None
+    depth: float | None = None
+    weight: float | None = None
+    color: str | None = None
+    material: str | None = None
+    category: str | None = None
+    delivery_time: str | None = None
+    description: str | None = None
+    enrichment: str | None = None
+
+    @classmethod
+    def from_product(cls, product: Product) -> "ProductRecord":
+        dimensions = product.dimensions
+        return cls(
+            name=product.name,
+            image_url=product.image_url,
+            price_eur=product.price_eur,
+            product_url=product.product_url,
+            brand=product.brand,
+            rating=product.rating,
+            width=dimensions.width if dimensions else None,
+            height=dimensions.height if dimensions else None,
+            depth=dimensions.depth if dimensions else None,
+            weight=product.weight,
+            color=product.color,
+            material=product.material,
+            category=product.category,
+            delivery_time=product.delivery_time,
+            description=product.description,
+            enrichment=product.enrichment,
+        )
+
+    def to_product(self) -> Product:
+        dimensions = None
+        if self.width is not None and self.height is not None and self.depth is not None:
+            dimensions = Dimensions.model_construct(width=self.width, height=self.height, depth=self.depth)
+
+        return Product.model_construct(
+            name=self.name,
+            image_url=self.image_url,
+            price_eur=self.price_eur,
+            product_url=self.product_url,
+            dimensions=dimensions,
+            weight=self.weight,
+            color=self.color,
+            material=self.material,
+            category=self.category,
+            brand=self.brand,
+            rating=self.rating,
+            delivery_time=self.delivery_time,
+            description=self.description,
+            enrichment=self.enrichment,
+        )
+
+    def as_row(self) -> dict:
+        """Flat dict, one column per field, e.g. for pandas.DataFrame"""
+        return {field.name: getattr(self, field.name) for field in dataclass_fields(self)}
+
+
+# Responses are encoded by pydantic-core in one call, FastAPI would validate the return value
+# again and go through jsonable_encoder and json.dumps
+_products_adapter = TypeAdapter(list[Product])
+_batch_adapter = TypeAdapter(list[BatchResult])
+
+
+def encode_products(products: list[Product]) -> bytes:
+    return _products_adapter.dump_json(products)
+
+
+def encode_batch(results: list[BatchResult]) -> bytes:
+    return _batch_adapter.dump_json(results)
+
+
+def products_to_rows(products: list[Product]) -> list[dict]:
+    """Flat rows with the dimensions as columns, for pandas and notebooks"""
+    return [ProductRecord.from_product(product).as_row() for product in products]
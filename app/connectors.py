@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import NamedTuple
+
+from app.metrics import CONNECTOR_RESULTS, stage
+from app.models import Filters, Product
+
+
+logger = logging.getLogger(__name__)
+
+# Outcome of the last alternative before a fallback connector: timeout, error or deferred
+fallback_reason: ContextVar[str] = ContextVar("fallback_reason", default="none")
+
+
+class Connector:
+    """A product source a search can be dispatched to.
+
+    Connectors of the same `source` (retailer) are alternatives tried in order, e.g. the
+    local catalog before the live home24 listing. Different sources are searched
+    concurrently, each connector under its own `deadline` in seconds. The sources of
+    this app serve disjoint filters (floors or home24), so a search reaches one of them.
+
+    A `fallback` connector answers with placeholder products when the alternatives before
+    it did not, its answer marks the listing as degraded. Why it ran is in `fallback_reason`.
+    """
+
+    name: str
+    source: str
+    deadline: float | None = None
+    fallback: bool = False
+
+    def can_serve(self, filters: Filters) -> bool:
+        raise NotImplementedError
+
+    async def search(self, filters: Filters, limit: int, offset: int) -> tuple[list[Product], bool] | None:
+        """Products and whether they still lack the detail page fields, None to defer to the next connector"""
+        raise NotImplementedError
+
+
+class Listing(NamedTuple):
+    products: list[Product]
+    pending: list[int]
+    """Indexes of the products that still need their detail pages"""
+    degraded: bool = False
+    """A source failed, missed its deadline or answered with its fallback"""
+
+
+class SourcesUnavailable(Exception):
+    """No source serving the filters answered"""
+
+
+async def search_connectors(
+    connectors: list[Connector], filters: Filters, limit: int, offset: int, deadline: float | None = None
+) -> Listing:
+    """Fan `filters` out to every source that serves them and merge the results.
+
+    A source that fails or misses its deadline contributes nothing and degrades the listing,
+    SourcesUnavailable is raised when none of them answered. `deadline` is the time.monotonic()
+    of the whole request, it cuts every connector's own deadline short except a fallback's.
+    """
+    by_source: dict[str, list[Connector]] = {}
+    for connector in connectors:
+        if connector.can_serve(filters):
+            by_source.setdefault(connector.source, []).append(connector)
+
+    # A query that only one source serves does not pay for the fan-out
+    if len(by_source) == 1:
+        results = [await _search_source(*by_source.values(), filters, limit, offset, deadline)]
+    else:
+        results = await asyncio.gather(*(
+            _search_source(candidates, filters, limit, offset, deadline) for candidates in by_source.values()
+        ))
+
+    answered = [result for result in results if result is not None]
+    if results and not answered:
+        raise SourcesUnavailable(f"None of {', '.join(by_source)} answered")
+
+    products: list[Product] = []
+    needs_details: list[bool] = []
+    for _, (source_products, needed) in answered:
+        products.extend(source_products)
+        needs_details.extend([needed] * len(source_products))
+
+    if len(answered) > 1:
+        order = sorted(range(len(products)), key=_sort_key(filters, products))
+        products = [products[index] for index in order]
+        needs_details = [needs_details[index] for index in order]
+
+    degraded = len(answered) < len(results) or any(connector.fallback for connector, _ in answered)
+    return Listing(products, [index for index, needed in enumerate(needs_details) if needed], degraded)
+
+
+async def _search_source(
+    candidates: list[Connector], filters: Filters, limit: int, offset: int, deadline: float | None
+) -> tuple[Connector, tuple[list[Product], bool]] | None:
+    """The connector that answered and its result, None when every candidate failed or deferred"""
+    outcome = "none"
+    for connector in candidates:
+        if connector.fallback:
+            fallback_reason.set(outcome)
+        timeout = connector.deadline
+        # A fallback answers locally, it still gets its turn once the request deadline has passed
+        if deadline is not None and not connector.fallback:
+            remaining = max(0.0, deadline - time.monotonic())
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        try:
+            with stage(f"connector_{connector.name}"):
+                result = await asyncio.wait_for(connector.search(filters, limit, offset), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("%s missed its %.1f s deadline", connector.name, timeout)
+            CONNECTOR_RESULTS.labels(connector.name, "timeout").inc()
+            outcome = "timeout"
+            continue
+        except Exception as e:
+            logger.error("%s failed: %s", connector.name, e)
+            CONNECTOR_RESULTS.labels(connector.name, "error").inc()
+            outcome = "error"
+            continue
+
+        if result is None:
+            CONNECTOR_RESULTS.labels(connector.name, "deferred").inc()
+            outcome = "deferred"
+            continue
+
+        CONNECTOR_RESULTS.labels(connector.name, "ok").inc()
+        return connector, result
+
+    return None
+
+
+def _sort_key(filters: Filters, products: list[Product]):
+    # Same precedence as Filters.to_query_params, otherwise every source keeps its own order
+    if filters.prices_low_to_high:
+        return lambda index: products[index].price_eur
+    if filters.prices_high_to_low:
+        return lambda index: -products[index].price_eur
+    if filters.sort_by_rating:
+        return lambda index: -products[index].rating
+    return lambda index: 0
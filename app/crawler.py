@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+
+from app.catalog import ProductCatalog, catalog
+from app.categories import category_resolver
+from app.constants import (
+    CATALOG_CRAWL_INTERVAL,
+    CATALOG_ENABLED,
+    CATALOG_MAX_PRODUCTS,
+    CATALOG_PAGE_SIZE,
+)
+from app.extractions import fetch_product_listing, set_extra_data
+from app.models import Filters
+from app.scheduler import BACKGROUND, fetch_priority
+
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogCrawler:
+    """Walks every known category page by page and stores the enriched products.
+
+    Crawls run in one background task at BACKGROUND fetch priority, a category is only marked
+    fresh in the catalog when all of its pages were listed without being blocked. A category
+    larger than `max_products` is never complete and stays with the live listing.
+    """
+
+    def __init__(
+        self,
+        catalog: ProductCatalog,
+        enabled: bool = False,
+        interval: float = 6 * 60 * 60,
+        page_size: int = 48,
+        max_products: int = 2000,
+    ):
+        self.catalog = catalog
+        self.enabled = enabled
+        self.interval = interval
+        self.page_size = page_size
+        self.max_products = max_products
+        self._task: asyncio.Task | None = None
+
+        self.crawls = 0
+        self.failed = 0
+        self.capped = 0
+        self.products = 0
+        self.last_crawl: float | None = None
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def crawl_category(self, category: str) -> bool:
+        started = time.time()
+        offset = 0
+        complete = False
+
+        while offset < self.max_products:
+            products, live = await fetch_product_listing(Filters(category=category), self.page_size, offset)
+            if not live:
+                logger.warning("Crawl of %s stopped at offset %s, the listing is unavailable", category, offset)
+                return False
+
+            await asyncio.gather(*(set_extra_data(product) for product in products))
+            await asyncio.to_thread(self.catalog.upsert, category, products, start_rank=offset)
+            self.products += len(products)
+            offset += len(products)
+
+            if len(products) < self.page_size:
+                complete = True
+                break
+
+        if not complete:
+            # Filters and sorts over part of a category would miss products, live search answers it
+            logger.warning("Crawl of %s stopped at %s products, the category is left to live search", category, offset)
+            await asyncio.to_thread(self.catalog.mark_incomplete, category)
+            self.capped += 1
+            return True
+
+        await asyncio.to_thread(self.catalog.mark_crawled, category, started)
+        self.crawls += 1
+        self.last_crawl = time.time()
+        logger.info("Crawled %s products of %s in %.0f s", offset, category, time.time() - started)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "enabled": int(self.enabled),
+            "crawls": self.crawls,
+            "failed": self.failed,
+            "capped": self.capped,
+            "products": self.products,
+            "seconds_since_crawl": round(time.time() - self.last_crawl) if self.last_crawl else -1,
+        }
+
+    async def _run(self):
+        fetch_priority.set(BACKGROUND)
+        while True:
+            for category in category_resolver.keys:
+                try:
+                    crawled = await self.crawl_category(category)
+                except Exception as e:
+                    logger.error("Crawl of %s failed: %s", category, e)
+                    crawled = False
+
+                if not crawled:
+                    self.failed += 1
+
+            await asyncio.sleep(self.interval)
+
+
+catalog_crawler = CatalogCrawler(
+    catalog,
+    enabled=CATALOG_ENABLED,
+    interval=CATALOG_CRAWL_INTERVAL,
+    page_size=CATALOG_PAGE_SIZE,
+    max_products=CATALOG_MAX_PRODUCTS,
+)
@@ -0,0 +1,127 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from app.cache import SqliteStore, TTLCache
+from app.constants import (
+    DETAIL_CACHE_PATH,
+    DETAIL_CACHE_SIZE,
+    DETAIL_STABLE_REFRESH,
+    DETAIL_STABLE_TTL,
+    DETAIL_VOLATILE_REFRESH,
+    DETAIL_VOLATILE_TTL,
+)
+from app.scheduler import BACKGROUND, fetch_priority
+
+
+logger = logging.getLogger(__name__)
+
+
+STABLE_FIELDS = ("dimensions", "weight", "color", "material", "category", "description")
+VOLATILE_FIELDS = ("delivery_time",)
+
+
+class ProductDetailCache:
+    """Cache of the fields scraped from product detail pages, keyed by product url.
+
+    Stable fields (dimensions, description, ...) and volatile fields (delivery time) live in
+    separate tiers with their own TTLs. Past `*_refresh` seconds an entry is still served but
+    refreshed in the background, past `*_ttl` seconds it is gone and has to be fetched again.
+    With a `path` both tiers persist in SQLite, which is read and written off the event loop.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 5000,
+        stable_ttl: float = 7 * 24 * 60 * 60,
+        stable_refresh: float = 24 * 60 * 60,
+        volatile_ttl: float = 6 * 60 * 60,
+        volatile_refresh: float = 60 * 60,
+        path: str = "",
+    ):
+        self.stable_refresh = stable_refresh
+        self.volatile_refresh = volatile_refresh
+        self.stable = TTLCache(
+            maxsize=maxsize,
+            ttl=stable_ttl,
+            store=SqliteStore(path, table="product_stable") if path else None,
+        )
+        self.volatile = TTLCache(
+            maxsize=maxsize,
+            ttl=volatile_ttl,
+            store=SqliteStore(path, table="product_volatile") if path else None,
+        )
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self.refresh_count = 0
+
+    async def get(self, product_url: str, fields: list[str] | None = None) -> tuple[dict, bool] | None:
+        """Return the cached details and whether they should be refreshed.
+
+        With `fields` only the tiers holding those fields have to be present.
+        """
+        fields = fields or STABLE_FIELDS + VOLATILE_FIELDS
+        details = {}
+        stale = False
+
+        for tier, tier_fields, refresh in (
+            (self.stable, STABLE_FIELDS, self.stable_refresh),
+            (self.volatile, VOLATILE_FIELDS, self.volatile_refresh),
+        ):
+            if not any(field in tier_fields for field in fields):
+                continue
+            entry = await tier.aget_entry(product_url)
+            if entry is None:
+                return None
+            details.update(entry[0])
+            stale = stale or entry[1] > refresh
+
+        return details, stale
+
+    async def set(self, product_url: str, details: dict):
+        await self.stable.aset(product_url, {field: details.get(field) for field in STABLE_FIELDS})
+        await self.volatile.aset(product_url, {field: details.get(field) for field in VOLATILE_FIELDS})
+
+    def refresh(self, product_url: str, fetch: Callable[[str], Awaitable[dict | None]]):
+        """Re-fetch the details of `product_url` in the background, once at a time per url"""
+        if product_url in self._refreshing:
+            return
+
+        task = asyncio.create_task(self._refresh(product_url, fetch))
+        self._refreshing[product_url] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(product_url, None))
+
+    async def close(self):
+        tasks = list(self._refreshing.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "stable": self.stable.stats(),
+            "volatile": self.volatile.stats(),
+            "refreshing": len(self._refreshing),
+            "refresh_count": self.refresh_count,
+        }
+
+    async def _refresh(self, product_url: str, fetch: Callable[[str], Awaitable[dict | None]]):
+        fetch_priority.set(BACKGROUND)
+        try:
+            details = await fetch(product_url)
+        except Exception as e:
+            logger.warning("Background refresh failed. error: %s, url: %s", e, product_url)
+            return
+
+        self.refresh_count += 1
+        if details is not None:
+            await self.set(product_url, details)
+
+
+detail_cache = ProductDetailCache(
+    maxsize=DETAIL_CACHE_SIZE,
+    stable_ttl=DETAIL_STABLE_TTL,
+    stable_refresh=DETAIL_STABLE_REFRESH,
+    volatile_ttl=DETAIL_VOLATILE_TTL,
+    volatile_refresh=DETAIL_VOLATILE_REFRESH,
+    path=DETAIL_CACHE_PATH,
+)
@@ -1,24 +1,57 @@
 import asyncio
 import json
 import logging
-import re
+import time
 from decimal import Decimal
+from typing import AsyncIterator
 from urllib.parse import quote
 
-import aiohttp
-import requests
-from bs4 import BeautifulSoup
 from pydantic_core import ValidationError
-from playwright.async_api import async_playwright
 
-from app.constants import CATEGORY_TO_ID, BASE_URL, HEADERS, PRODUCT_SEARCH_HASH, CATEGORY_SEARCH_HASH
-from app.floors import floors
-from app.models import Filters, Product, Dimensions
+from app.browser import browser_pool, navigate
+from app.cache import TTLCache
+from app.catalog import catalog_connector
+from app.categories import DEFAULT_CATEGORY, category_resolver
+from app.compact import ProductRecord, products_to_rows
+from app.constants import (
+    BASE_URL,
+    PRODUCT_SEARCH_HASH,
+    CATEGORY_SEARCH_HASH,
+    LISTING_CACHE_SIZE,
+    LISTING_CACHE_TTL,
+    DETAIL_FETCHERS,
+    HOME24_DEADLINE,
+)
+from app.detail_cache import STABLE_FIELDS, VOLATILE_FIELDS, detail_cache
+from app.fetchers import FetchBlocked, check_status, fetch_json, fetch_scheduler, http_fetcher
+from app.connectors import Connector, Listing, fallback_reason, search_connectors
+from app.floors import floors_connector
+from app.metrics import HARDCODED_FALLBACKS, stage, timed
+from app.models import Dimensions, Filters, Product, ProductDetails
+from app.singleflight import SingleFlight
+from app.workers import parse_pool
 
 
 logger = logging.getLogger(__name__)
 
 
+DETAIL_FIELDS = STABLE_FIELDS + VOLATILE_FIELDS
+
+# The sections read by app/parsing.py, their presence means the page is ready to be parsed
+DETAIL_READY_SELECTOR = '[data-section-name="product_dimensions"], [data-testid="section-content-product_details"]'
+# Fields a detail source must yield before the next source in DETAIL_FETCHERS is skipped
+DETAIL_CORE_FIELDS = ("width", "height", "depth", "color", "material", "delivery_time")
+# Markup only a real product page has, a page with one of these is never taken for a block page
+DETAIL_MARKERS = (
+    'data-section-name="product_dimensions"', 'data-testid="section-content-product_details"',
+    '__NEXT_DATA__', '__APOLLO_STATE__', 'application/ld+json',
+)
+
+listing_cache = TTLCache(maxsize=LISTING_CACHE_SIZE, ttl=LISTING_CACHE_TTL)
+listing_flight = SingleFlight()
+detail_flight = SingleFlight()
+
+
 def _get_hardcoded_products() -> list[Product]:
     """Fallback hardcoded product list when access is blocked"""
     products = [
@@ -101,49 +134,174 @@ def _get_hardcoded_products() -> list[Product]:
     return products
 
 
-async def get_product_list(filters: Filters, limit: int = 10, offset: int = 0) -> list[Product]:
-    if filters.is_floors_search:
-        return floors
+async def get_product_list(
+    filters: Filters,
+    limit: int = 10,
+    offset: int = 0,
+    fields: list[str] | None = None,
+    deadline: float | None = None,
+) -> Listing:
+    """Listing products enriched in place with their detail page fields.
+
+    `fields` limits the enrichment to those detail page fields, an empty list skips the
+    detail pages entirely. `deadline` is a time.monotonic() that bounds the listing and the
+    enrichment together, products not enriched by then are returned as they are and flagged
+    with enrichment="timeout".
+    """
+    listing = await get_product_listing(filters, limit, offset, deadline)
+
+    if listing.pending:
+        async for _ in _enrich_products(listing.products, listing.pending, fields, deadline):
+            pass
+
+    return listing
+
+
+async def iter_product_list(
+    filters: Filters,
+    limit: int = 10,
+    offset: int = 0,
+    fields: list[str] | None = None,
+    deadline: float | None = None,
+) -> AsyncIterator[tuple[str, int, dict]]:
+    """Yield ("product", index, fields) for every listing row first, then
+    ("details", index, fields) for each product as soon as its detail page is done.
+    """
+    products, pending, _ = await get_product_listing(filters, limit, offset, deadline)
+
+    if pending and fields is not None and not fields:
+        _skip_enrichment(products, pending)
+        pending = []
+
+    for index, product in enumerate(products):
+        yield "product", index, product.model_dump()
+
+    if not pending:
+        return
 
-    data = _prepare_request_data(filters, limit, offset)
-    url = f"{BASE_URL}/graphql?extensions={quote(data['extensions'])}&variables={quote(data['variables'])}"
+    include = set(fields or DETAIL_FIELDS) | {"enrichment"}
+    async for index in _enrich_products(products, pending, fields, deadline):
+        yield "details", index, products[index].model_dump(include=include)
+
+
+async def _enrich_products(
+    products: list[Product], indexes: list[int], fields: list[str] | None, deadline: float | None
+) -> AsyncIterator[int]:
+    """Enrich the products at `indexes` concurrently and yield the index of each one as it is done.
+
+    Whatever is still running at `deadline` (time.monotonic()) is cancelled, flagged and yielded last.
+    """
+    if fields is not None and not fields:
+        _skip_enrichment(products, indexes)
+        return
+
+    tasks = {asyncio.create_task(set_extra_data(products[index], fields)): index for index in indexes}
+    pending = set(tasks)
+
+    try:
+        while pending:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield tasks[task]
+
+        # The detail fetches themselves keep running and still fill the cache
+        for task in pending:
+            task.cancel()
+        for task in pending:
+            products[tasks[task]].enrichment = "timeout"
+            yield tasks[task]
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _skip_enrichment(products: list[Product], indexes: list[int]):
+    for index in indexes:
+        products[index].enrichment = "skipped"
+
+
+class Home24Connector(Connector):
+    """The live home24 GraphQL listing"""
+
+    name = "home24"
+    source = "home24"
+
+    def __init__(self, deadline: float):
+        self.deadline = deadline
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page(locale="de-DE")
+    def can_serve(self, filters: Filters) -> bool:
+        return not filters.is_floors_search
 
-        # Set headers
-        await page.set_extra_http_headers(HEADERS)
+    async def search(self, filters: Filters, limit: int, offset: int) -> tuple[list[Product], bool] | None:
+        products, live = await fetch_product_listing(filters, limit, offset)
+        # The hardcoded products are left to the fallback connector, which flags the listing
+        return (products, True) if live else None
 
-        # Navigate to the URL and wait for network to be idle
-        response = await page.goto(url, wait_until="networkidle")
 
-        if response.status != 200:
-            await browser.close()
-            raise Exception(f"Error: {response.status} - {response.status_text}")
+class HardcodedConnector(Connector):
+    """The hardcoded products, answers when the live listing failed, timed out or is blocked"""
 
-        # Check if response contains blocked access or is not JSON
+    name = "hardcoded"
+    source = "home24"
+    fallback = True
+
+    def can_serve(self, filters: Filters) -> bool:
+        return not filters.is_floors_search
+
+    async def search(self, filters: Filters, limit: int, offset: int) -> tuple[list[Product], bool]:
+        HARDCODED_FALLBACKS.labels(fallback_reason.get()).inc()
+        return _get_hardcoded_products()[offset:offset + limit], False
+
+
+home24_connector = Home24Connector(deadline=HOME24_DEADLINE)
+hardcoded_connector = HardcodedConnector()
+
+# Alternatives of one source are tried in this order
+CONNECTORS: list[Connector] = [floors_connector, catalog_connector, home24_connector, hardcoded_connector]
+
+
+async def get_product_listing(
+    filters: Filters, limit: int = 10, offset: int = 0, deadline: float | None = None
+) -> Listing:
+    """Products of every connector serving `filters`, and the indexes of those still lacking the detail page fields"""
+    return await search_connectors(CONNECTORS, filters, limit, offset, deadline)
+
+
+async def fetch_product_listing(filters: Filters, limit: int = 10, offset: int = 0) -> tuple[list[Product], bool]:
+    """The live GraphQL listing, the hardcoded products come with False when it is unavailable"""
+    data = _prepare_request_data(filters, limit, offset)
+    url = f"{BASE_URL}/graphql?extensions={quote(data['extensions'])}&variables={quote(data['variables'])}"
+
+    # The url holds the query params, limit, offset and persisted query
+    records = listing_cache.get(url)
+    if records is None:
         try:
-            response_text = await page.content()
-            if "blocked access" in response_text.lower() or "access denied" in response_text.lower() or "captcha" in response_text.lower():
-                await browser.close()
-                logger.warning("Access blocked, returning hardcoded product list")
-                return _get_hardcoded_products()
-
-            # Get the JSON response from the body
-            json_data = await response.json()
-        except Exception as e:
-            await browser.close()
-            logger.warning(f"Failed to parse JSON response, returning hardcoded product list: {e}")
-            return _get_hardcoded_products()
+            # Identical concurrent searches share one upstream request
+            records = await listing_flight.do(url, lambda: _fetch_listing(url, filters))
+        except FetchBlocked as e:
+            logger.warning(f"Access blocked, returning hardcoded product list: {e}")
+            return _get_hardcoded_products(), False
 
-        await browser.close()
+        if records is None:
+            return _get_hardcoded_products(), False
 
-    products = await _parse_response_data(json_data, filters)
+        listing_cache.set(url, records)
+
+    # Every caller enriches its own Products, the cached records stay untouched
+    return [record.to_product() for record in records], True
 
-    return products
 
+async def _fetch_listing(url: str, filters: Filters) -> list[ProductRecord] | None:
+    with stage("graphql_fetch"):
+        json_data = await fetch_json(url)
 
+    return _parse_response_data(json_data, filters)
+
+
+@timed("prepare_request_data")
 def _prepare_request_data(filters: Filters, limit: int, offset: int) -> dict:
     variables = {
       "urlParams": filters.to_query_params(),
@@ -157,7 +315,7 @@ def _prepare_request_data(filters: Filters, limit: int, offset: int) -> dict:
         variables["query"] = filters.product_name
 
     if filters.is_category_search:
-        variables["id"] = CATEGORY_TO_ID["sofa-couch"]
+        variables["id"] = category_resolver.category_id(filters.category or DEFAULT_CATEGORY)
         variables["backend"] = "ThirdParty"
 
     extensions = {
@@ -177,7 +335,8 @@ def _prepare_request_data(filters: Filters, limit: int, offset: int) -> dict:
     }
 
 
-async def _parse_response_data(data, filters: Filters) -> list[Product]:
+@timed("parse_response_data")
+def _parse_response_data(data, filters: Filters) -> list[ProductRecord] | None:
     try:
         products = []
 
@@ -186,221 +345,180 @@ async def _parse_response_data(data, filters: Filters) -> list[Product]:
             logger.warning("Invalid JSON structure in response, returning hardcoded product list")
             if data is not None:
                 logger.warning("Example of invalid data: %s", data)
-            return _get_hardcoded_products()
+            return None
 
         data = data["data"]["categories"]
 
         # Check if categories data exists
         if not data:
             logger.warning("No categories data in response, returning hardcoded product list")
-            return _get_hardcoded_products()
+            return None
 
         product_list = data["articles"] if filters.is_product_search else data[0]["categoryArticles"]["articles"]
 
         for product in product_list:
             price = Decimal(product["prices"]["regular"]["value"]) / Decimal(100)
 
-            product_obj = Product(
+            product_obj = ProductRecord(
                 name=product["name"],
                 image_url=product["images"][0]["path"],
                 price_eur=float(price),
                 product_url=BASE_URL + "/" + product["url"],
                 brand=product["brand"]["name"],
-                rating=product["ratings"]["average"]
+                rating=float(product["ratings"]["average"])
             )
             products.append(product_obj)
 
-        await asyncio.gather(*[set_extra_data(product) for product in products])
-
         return products
     except (KeyError, TypeError, IndexError) as e:
         logger.warning(f"Error parsing response data: {e}, returning hardcoded product list")
-        return _get_hardcoded_products()
-
-
-
-async def set_extra_data(product: Product):
-    async with async_playwright() as p:
-        browser = await p.chromium.launch()
-        page = await browser.new_page(locale="de-DE")
+        return None
 
-        # Set headers
-        await page.set_extra_http_headers(HEADERS)
 
-        # Navigate to the product URL
-        response = await page.goto(product.product_url, wait_until="networkidle")
-
-        if response.status != 200:
-            logger.error("Request to product detail failed. status: %s, url: %s", response.status, product.product_url)
-            await browser.close()
-            return
+@timed("set_extra_data")
+async def set_extra_data(product: Product, fields: list[str] | None = None):
+    try:
+        details = await get_product_details(product.product_url, fields)
+    except Exception as e:
+        logger.error("Could not enrich product. error: %s, url: %s", e, product.product_url)
+        details = None
 
-        # Get the HTML content
-        html = await page.content()
-        await browser.close()
+    apply_details(product, details, fields)
 
-    soup = BeautifulSoup(html, 'html.parser')
 
-    dimension_dict = extract_dimensions(soup)
-    try:
-        product.dimensions = Dimensions(**dimension_dict)
-    except ValidationError:
-        logger.error("Could not set dimensions. dimension_dict: %s, url: %s", dimension_dict, product.product_url)
+def apply_details(product: Product, details: dict | None, fields: list[str] | None = None):
+    """Copy the detail page fields onto the product, None marks the enrichment as failed"""
+    if details is None:
+        product.enrichment = "failed"
         return
-    product.weight = dimension_dict["weight"]
-
-    color_and_material_dict = extract_color_and_material(soup)
-    product.color = color_and_material_dict["color"]
-    product.material = color_and_material_dict["material"]
 
-    category_name = extract_category_name(soup)
-    product.category = category_name
+    for field in fields or DETAIL_FIELDS:
+        if field == "dimensions":
+            if details["dimensions"] is not None:
+                product.dimensions = Dimensions(**details["dimensions"])
+        else:
+            setattr(product, field, details[field])
+    product.enrichment = "complete"
 
-    delivery_time = extract_delivery_time(soup)
-    product.delivery_time = delivery_time
 
-    product.description = extract_description(soup)
+async def get_product_details(product_url: str, fields: list[str] | None = None) -> dict | None:
+    """Extra product fields from the detail page, served from `detail_cache` when possible"""
+    cached = await detail_cache.get(product_url, fields)
+    if cached is not None:
+        details, stale = cached
+        if stale:
+            detail_cache.refresh(product_url, _fetch_product_details)
+        return details
 
+    return await _fetch_product_details(product_url)
 
-def extract_dimensions(soup):
-    main_section = soup.find('div', attrs={'data-section-name': "product_dimensions"})
 
-    data = {
-        "width": None,
-        "height": None,
-        "depth": None,
-        "weight": None
-    }
+async def _fetch_product_details(product_url: str) -> dict | None:
+    # Caching inside the flight lets fetches abandoned at a deadline still fill the cache
+    return await detail_flight.do(product_url, lambda: _load_and_cache_product_details(product_url))
 
-    pattern = {
-        "Tiefe": "depth",
-        "Höhe": "height",
-        "Breite": "width",
-        "Gewicht": "weight"
-    }
 
-    if not main_section:
-        return data
+async def _load_and_cache_product_details(product_url: str) -> dict | None:
+    details = await _load_product_details(product_url)
+    if details is not None:
+        await detail_cache.set(product_url, details)
+    return details
 
-    for label, key in pattern.items():
-        element = main_section.find('div', string=label)
 
-        if not element:
-            continue
+async def _load_product_details(product_url: str) -> dict | None:
+    """Read the detail page from the sources in DETAIL_FETCHERS, merging their fields.
 
-        second_element = element.parent.contents[1]
-        if not second_element:
+    A later source is only skipped once DETAIL_CORE_FIELDS are all found, a raw page with
+    nothing but a JSON-LD description still goes on to the browser render.
+    """
+    extracted = ProductDetails()
+    for source in DETAIL_FETCHERS:
+        try:
+            html = await fetch_scheduler.run(product_url, lambda: DETAIL_LOADERS[source](product_url))
+        except Exception as e:
+            logger.warning("Detail page fetch failed. source: %s, error: %s, url: %s", source, e, product_url)
             continue
 
-        text = second_element.get_text(strip=True)
-        number = re.search(r'\d+', text)
-
-        if not number:
+        if html is None:
             continue
 
-        data[key] = int(number.group(0))
+        parsed = await parse_pool.parse(html)
+        # Earlier sources win, later ones only fill what is still missing
+        found = {field: value for field, value in parsed if value is not None and getattr(extracted, field) is None}
+        extracted = extracted.model_copy(update=found)
+        if all(getattr(extracted, field) is not None for field in DETAIL_CORE_FIELDS):
+            break
+        logger.info("Product details incomplete in page. source: %s, url: %s", source, product_url)
 
-    return data
+    if all(value is None for _, value in extracted):
+        return None
 
+    try:
+        dimensions = Dimensions(width=extracted.width, height=extracted.height, depth=extracted.depth).model_dump()
+    except ValidationError:
+        logger.error("Could not set dimensions. details: %s, url: %s", extracted, product_url)
+        dimensions = None
 
-def extract_color_and_material(soup):
-    data = {
-        "material": None,
-        "color": None
+    return {
+        "dimensions": dimensions,
+        "weight": extracted.weight,
+        "color": extracted.color,
+        "material": extracted.material,
+        "category": extracted.category,
+        "delivery_time": extracted.delivery_time,
+        "description": extracted.description,
     }
 
 
-    main_section = soup.find('section', attrs={'data-testid': 'section-content-product_details'})
-    if not main_section:
-        return data
+async def _load_html_with_http(product_url: str) -> str | None:
+    """Raw server rendered HTML, enough when the page embeds its state or renders on the server"""
+    with stage("detail_http_fetch"):
+        status, html = await http_fetcher.get_text(product_url)
 
-    material_header = main_section.find('span', string=re.compile(r'Material'))
-
-    if material_header:
-        text = material_header.get_text(strip=True)
-        data["material"] = text.split(":")[1].strip()
-
-    color_header = main_section.find('div', string='Farbe')
-    if color_header:
-        parent = color_header.parent
-        ul = parent.find('ul')
-        if ul:
-            span = ul.find('span')
-            if span:
-                data["color"] = span.get_text(strip=True)
-
-    return data
-
-
-def extract_category_name(soup):
-    main_section = soup.find('ol', attrs={'class': 'emotion-cache-12rx5a3'})
-
-    if not main_section:
-        return None
-
-    last_li = main_section.contents[-1]
-
-    if not last_li:
-        return None
-
-    span = last_li.find('span')
-    if not span:
+    check_status(status, html, DETAIL_MARKERS)
+    if status != 200:
+        logger.error("Request to product detail failed. status: %s, url: %s", status, product_url)
         return None
+    return html
 
-    return span.get_text(strip=True)
-
-
-def extract_delivery_time(soup):
-    main_section = soup.find('section', attrs={'data-testid': 'delivery-time-notice'})
 
-    if not main_section:
-        return None
+async def _load_html_with_browser(product_url: str) -> str | None:
+    async with browser_pool.page() as page:
+        # Navigate to the product URL
+        with stage("detail_page_load"):
+            response = await navigate(page, product_url, ready_selector=DETAIL_READY_SELECTOR)
 
-    delivery_div = main_section.find(lambda tag: tag.name == 'div' and re.compile(r'Lieferung').search(tag.get_text()))
+        # Get the HTML content
+        html = await page.content()
 
-    if not delivery_div:
+    check_status(response.status, html, DETAIL_MARKERS)
+    if response.status != 200:
+        logger.error("Request to product detail failed. status: %s, url: %s", response.status, product_url)
         return None
+    return html
 
-    text = delivery_div.get_text(strip=True)
-    delivery_time = text.split(":")[1].strip()
-    return delivery_time
 
-def extract_description(soup):
-    main_section = soup.find('div', attrs={'id': "accordion-section-region-product_description"})
-    if not main_section:
-        return None
-
-    return main_section.get_text()
+DETAIL_LOADERS = {
+    "http": _load_html_with_http,
+    "browser": _load_html_with_browser,
+}
 
 
 if __name__ == '__main__':
     url = "https://www.home24.de/produkt/sofa-jenny-3-sitzplaetze-beige-chenille-90-x-73-x-178-cm"
 
-    # async def main():
-    #     async with aiohttp.ClientSession(headers=HEADERS) as session:
-    #         async with session.get(url) as response:
-    #             if response.status != 200:
-    #                 print("error", response.status)
-    #                 html = await response.read()
-    #
-    #             else:
-    #                 print("success")
-    #                 html = await response.read()
-    #
-    #     soup = BeautifulSoup(html, 'html.parser')
-    #
-    #     print(extract_description(soup))
-
     async def main():
         filters = Filters(sort_by_popularity=True)
 
         print("fetching and extracting...")
-        products = await get_product_list(filters=filters)
+        products = (await get_product_list(filters=filters)).products
+        await browser_pool.close()
+        await http_fetcher.close()
 
         print("done")
         import pandas as pd
 
-        df = pd.DataFrame([p.__dict__ for p in products])
+        df = pd.DataFrame(products_to_rows(products))
         print(df.to_markdown())
 
     asyncio.run(main())
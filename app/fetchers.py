@@ -0,0 +1,217 @@
+import asyncio
+import json
+import logging
+import re
+import time
+
+import aiohttp
+
+from app.browser import browser_pool, navigate
+from app.constants import (
+    CIRCUIT_COOLDOWN,
+    CIRCUIT_THRESHOLD,
+    FETCH_BACKOFF,
+    FETCH_CONCURRENCY,
+    FETCH_HOST_BURST,
+    FETCH_HOST_RATE,
+    FETCH_RETRIES,
+    GRAPHQL_FETCHERS,
+    HEADERS,
+    HTTP_LIMIT_PER_HOST,
+    HTTP_POOL_LIMIT,
+    HTTP_TIMEOUT,
+)
+from app.metrics import stage
+from app.scheduler import CircuitOpen, FetchScheduler
+
+
+logger = logging.getLogger(__name__)
+
+
+BLOCK_MARKERS = ("blocked access", "access denied", "captcha", "are you a robot", "just a moment", "attention required")
+
+_TITLE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+
+
+class FetchBlocked(Exception):
+    """Upstream answered with a bot protection page instead of data, feeds the circuit breaker and is not retried"""
+
+
+class BlockPage(FetchBlocked):
+    """The response is a captcha or access denied page"""
+
+
+class UpstreamError(Exception):
+    """Upstream answered with a status other than 200.
+
+    Another backend may still get an answer, so fetch_json falls back, but the same request
+    gets the same status again and is not retried.
+    """
+
+    def __init__(self, status: int, reason: str = ""):
+        super().__init__(f"status: {status} {reason}".rstrip())
+        self.status = status
+
+
+class ServerError(UpstreamError):
+    """Upstream failed with a 5xx status, worth retrying"""
+
+
+def check_status(status: int, text: str, expected: tuple[str, ...] = ()):
+    """Raise the scheduler visible error for a failed response"""
+    if is_blocked(text, expected):
+        raise BlockPage(f"status: {status}")
+    if status in (403, 429):
+        raise FetchBlocked(f"status: {status}")
+    if status >= 500:
+        raise ServerError(status)
+
+
+def is_blocked(text: str, expected: tuple[str, ...] = ()) -> bool:
+    """Whether `text` is a bot protection page instead of the content.
+
+    A response holding one of the `expected` markers is real content, even when it loads a
+    captcha script. Otherwise an HTML page is judged by its title only, and an untitled body
+    (an API error) only when it is short.
+    """
+    if any(marker in text for marker in expected):
+        return False
+
+    title = _TITLE.search(text)
+    if title is not None:
+        text = title.group(1)
+    elif len(text) > 2048:
+        return False
+
+    text = text.lower()
+    return any(marker in text for marker in BLOCK_MARKERS)
+
+
+class Fetcher:
+    name: str
+
+    async def get_json(self, url: str) -> dict:
+        raise NotImplementedError
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+class HttpFetcher(Fetcher):
+    """Plain HTTP client with a pooled keep-alive session, used as the fast path"""
+
+    name = "http"
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 10, timeout: float = 15):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self._session: aiohttp.ClientSession | None = None
+
+    async def start(self):
+        if self._session is not None and not self._session.closed:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=30,
+            ttl_dns_cache=300,
+        )
+        # aiohttp decodes gzip/deflate natively and br through the brotli package, but not zstd
+        headers = {**HEADERS, "Accept": "application/json", "Accept-Encoding": "gzip, deflate, br"}
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def get_text(self, url: str) -> tuple[int, str]:
+        await self.start()
+        async with self._session.get(url) as response:
+            return response.status, await response.text()
+
+    async def get_json(self, url: str) -> dict:
+        status, text = await self.get_text(url)
+
+        check_status(status, text)
+        if status != 200:
+            raise UpstreamError(status)
+
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            raise FetchBlocked("response is not JSON")
+
+
+class BrowserFetcher(Fetcher):
+    """Loads the URL in the shared chromium pool, slow but hardest to block"""
+
+    name = "browser"
+
+    async def get_json(self, url: str) -> dict:
+        async with browser_pool.page() as page:
+            # The listing is a single JSON document, nothing else has to load
+            response = await navigate(page, url)
+
+            # Check if response contains blocked access or is not JSON
+            check_status(response.status, await page.content())
+            if response.status != 200:
+                raise UpstreamError(response.status, response.status_text)
+
+            try:
+                return await response.json()
+            except Exception as e:
+                raise FetchBlocked(f"response is not JSON: {e}")
+
+
+http_fetcher = HttpFetcher(limit=HTTP_POOL_LIMIT, limit_per_host=HTTP_LIMIT_PER_HOST, timeout=HTTP_TIMEOUT)
+browser_fetcher = BrowserFetcher()
+
+fetch_scheduler = FetchScheduler(
+    concurrency=FETCH_CONCURRENCY,
+    host_rate=FETCH_HOST_RATE,
+    host_burst=FETCH_HOST_BURST,
+    retries=FETCH_RETRIES,
+    backoff=FETCH_BACKOFF,
+    circuit_threshold=CIRCUIT_THRESHOLD,
+    circuit_cooldown=CIRCUIT_COOLDOWN,
+    # A blocked request falls back to the next backend at once, only transient errors are retried
+    retry_on=(ServerError, aiohttp.ClientError, asyncio.TimeoutError),
+    block_on=(FetchBlocked,),
+)
+
+FETCHERS: dict[str, Fetcher] = {
+    http_fetcher.name: http_fetcher,
+    browser_fetcher.name: browser_fetcher,
+}
+
+
+async def fetch_json(url: str, backends: list[str] | None = None) -> dict:
+    """Fetch a JSON document trying each backend in order until one is not blocked"""
+    backends = backends or GRAPHQL_FETCHERS
+
+    for backend in backends:
+        fetcher = FETCHERS[backend]
+        start = time.perf_counter()
+        try:
+            with stage(f"fetch_{backend}"):
+                data = await fetch_scheduler.run(url, lambda: fetcher.get_json(url))
+        except (FetchBlocked, UpstreamError, CircuitOpen, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            elapsed = (time.perf_counter() - start) * 1000
+            logger.warning("%s backend failed after %.0f ms (%s: %s), trying next", backend, elapsed, type(e).__name__, e)
+            continue
+
+        elapsed = (time.perf_counter() - start) * 1000
+        logger.info("%s backend served %s in %.0f ms", backend, url.split("?")[0], elapsed)
+        return data
+
+    raise FetchBlocked(f"all backends failed: {', '.join(backends)}")
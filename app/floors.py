@@ -1,4 +1,5 @@
-from app.models import Product, Dimensions
+from app.connectors import Connector
+from app.models import Filters, Product, Dimensions
 
 floors = [
     Product(
@@ -78,3 +79,19 @@ floors = [
     )
 
 ]
+
+
+class FloorsConnector(Connector):
+    """Hornbach floors, a static list that already carries every detail field"""
+
+    name = "hornbach_floors"
+    source = "hornbach"
+
+    def can_serve(self, filters: Filters) -> bool:
+        return filters.is_floors_search
+
+    async def search(self, filters: Filters, limit: int, offset: int) -> tuple[list[Product], bool]:
+        return [product.model_copy(deep=True) for product in floors[offset:offset + limit]], False
+
+
+floors_connector = FloorsConnector()
@@ -0,0 +1,60 @@
+import hashlib
+from dataclasses import dataclass
+
+from app.cache import TTLCache
+from app.constants import HTTP_CACHE_MAX_AGE, HTTP_CACHE_SWR, RESULT_CACHE_SIZE, RESULT_CACHE_TTL
+from app.connectors import Listing
+from app.models import Filters
+
+
+# The result depends on the POST body, a shared cache keying by URL must not store it
+CACHE_CONTROL = f"private, max-age={HTTP_CACHE_MAX_AGE}, stale-while-revalidate={HTTP_CACHE_SWR}"
+
+
+@dataclass(slots=True)
+class CachedResult:
+    etag: str
+    body: bytes
+    cursor: str | None
+
+
+# Encoded /get responses by result key and by sentence key, a hit skips the LLM, home24 and the encoding
+result_cache = TTLCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+
+
+def _fields_key(fields: list[str] | None) -> str:
+    # The order of the requested fields does not change the result
+    return "*" if fields is None else ",".join(sorted(set(fields)))
+
+
+def result_key(filters: Filters, limit: int, offset: int, fields: list[str] | None) -> str:
+    # to_query_params leaves out the category and the floors flag, both change the result
+    query = filters.to_query_params()
+    return f"{query}|{filters.category}|{filters.is_floors_search}|{limit}|{offset}|{_fields_key(fields)}"
+
+
+def sentence_key(sentence: str, limit: int, offset: int, fields: list[str] | None) -> str:
+    """Key of a sentence search, looked up before the sentence is understood"""
+    normalized = " ".join(sentence.lower().split())
+    return f"sentence:{normalized}|{limit}|{offset}|{_fields_key(fields)}"
+
+
+def make_etag(key: str, body: bytes) -> str:
+    digest = hashlib.sha256(key.encode() + b"\n" + body).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match uses the weak comparison, a W/ prefix does not matter"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def is_cacheable(listing: Listing) -> bool:
+    # Fallback products, a missing source, a deadline or a failed detail page must not be repeated
+    if listing.degraded:
+        return False
+    return all(product.enrichment not in ("timeout", "failed") for product in listing.products)
@@ -0,0 +1,198 @@
+"""Runs queued search jobs, inside the API process or on its own:
+
+    uv run python -m app.job_worker
+
+Any number of worker processes can share one JOBS_PATH, each runs JOBS_CONCURRENCY jobs at a time.
+"""
+import asyncio
+import logging
+import os
+import signal
+import socket
+import time
+import uuid
+
+from app.ai import get_filters_from_sentence
+from app.browser import browser_pool
+from app.catalog import catalog
+from app.constants import BROWSER_PRELAUNCH, JOBS_CONCURRENCY, JOBS_POLL_INTERVAL
+from app.detail_cache import detail_cache
+from app.extractions import iter_product_list
+from app.fetchers import http_fetcher
+from app.jobs import JobQueue, job_queue
+from app.models import Filters
+from app.pagination import next_cursor
+from app.workers import parse_pool
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorker:
+    """Claims jobs from the queue and writes their products back as they come in.
+
+    The listing rows are stored as soon as they are parsed and every detail page updates its
+    product, writes are batched to one per `poll_interval`. Leases are renewed at a third of
+    their length, a job taken over by another worker is abandoned. Queue calls run in threads,
+    a write lock held by another process never stalls the event loop.
+    """
+
+    def __init__(self, queue: JobQueue, concurrency: int = 4, poll_interval: float = 1):
+        self.queue = queue
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.name = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._tasks: list[asyncio.Task] = []
+        self._purged = 0.0
+
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.abandoned = 0
+
+    def start(self):
+        if self.concurrency > 0 and not self._tasks:
+            self._tasks = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+            logger.info("Job worker %s started with %s slots", self.name, self.concurrency)
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "slots": len(self._tasks),
+            "running": self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "abandoned": self.abandoned,
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                claimed = await asyncio.to_thread(self.queue.claim, self.name)
+            except Exception as e:
+                logger.error("Could not claim a job: %s", e)
+                claimed = None
+
+            if claimed is None:
+                await self._purge()
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            job_id, request = claimed
+            self.running += 1
+            try:
+                await self.run_job(job_id, request)
+            finally:
+                self.running -= 1
+
+    async def run_job(self, job_id: str, request: dict):
+        heartbeat = asyncio.create_task(self._renew(job_id))
+        try:
+            await self._search(job_id, request)
+        except asyncio.CancelledError:
+            # Shutting down, hand the job back instead of waiting for the lease to run out
+            await asyncio.to_thread(self.queue.release, job_id, self.name)
+            raise
+        except _LeaseLost:
+            self.abandoned += 1
+            logger.warning("Job %s was taken over by another worker", job_id)
+        except Exception as e:
+            self.failed += 1
+            logger.error("Job %s failed: %s", job_id, e)
+            await asyncio.to_thread(self.queue.fail, job_id, self.name, str(e))
+        finally:
+            heartbeat.cancel()
+
+    async def _search(self, job_id: str, request: dict):
+        started = time.monotonic()
+        if request.get("filters") is not None:
+            filters = Filters.model_validate(request["filters"])
+        else:
+            filters = await get_filters_from_sentence(request["sentence"])
+
+        limit, offset = request["limit"], request["offset"]
+        deadline = None
+        if request.get("deadline_ms") is not None:
+            deadline = started + request["deadline_ms"] / 1000
+
+        products: list[dict] = []
+        written = None
+        async for event, index, fields in iter_product_list(
+            filters, limit=limit, offset=offset, fields=request.get("fields"), deadline=deadline
+        ):
+            if event == "product":
+                products.append(fields)
+                continue
+
+            # The first detail event means the listing is complete, store it right away
+            products[index].update(fields)
+            if written is not None and time.monotonic() - written < self.poll_interval:
+                continue
+            if not await asyncio.to_thread(self.queue.progress, job_id, self.name, products):
+                raise _LeaseLost()
+            written = time.monotonic()
+
+        cursor = next_cursor(filters, limit, offset, len(products))
+        if not await asyncio.to_thread(self.queue.complete, job_id, self.name, products, cursor):
+            raise _LeaseLost()
+        self.completed += 1
+
+    async def _purge(self):
+        # Idle workers drop old finished jobs, at most once an hour per worker
+        if self._purged and time.monotonic() - self._purged < 60 * 60:
+            return
+        self._purged = time.monotonic()
+        try:
+            purged = await asyncio.to_thread(self.queue.purge)
+        except Exception as e:
+            logger.warning("Could not purge old jobs: %s", e)
+            return
+        if purged:
+            logger.info("Purged %s finished jobs", purged)
+
+    async def _renew(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.queue.lease / 3)
+            if not await asyncio.to_thread(self.queue.renew, job_id, self.name):
+                return
+
+
+class _LeaseLost(Exception):
+    pass
+
+
+job_worker = JobWorker(job_queue, concurrency=JOBS_CONCURRENCY, poll_interval=JOBS_POLL_INTERVAL)
+
+
+async def main():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    if BROWSER_PRELAUNCH:
+        await browser_pool.start()
+    await http_fetcher.start()
+    await parse_pool.start()
+    job_worker.start()
+    try:
+        await stop.wait()
+    finally:
+        logger.info("Job worker %s stopping", job_worker.name)
+        await job_worker.close()
+        await detail_cache.close()
+        await http_fetcher.close()
+        await parse_pool.close()
+        await browser_pool.close()
+        catalog.close()
+        job_queue.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,191 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from app.constants import JOBS_LEASE, JOBS_MAX_ATTEMPTS, JOBS_PATH, JOBS_RETENTION
+from app.models import Job
+
+
+logger = logging.getLogger(__name__)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    products TEXT NOT NULL DEFAULT '[]',
+    next_cursor TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+
+class JobQueue:
+    """Durable queue of search jobs in a SQLite file that API and worker processes share.
+
+    A worker claims a job with a lease it keeps extending while it runs. A job whose lease ran
+    out (the worker died) is handed to the next worker, at most `max_attempts` times. Every
+    update names the worker, one that lost its lease can no longer write the job.
+
+    Every call is blocking, async code runs them with asyncio.to_thread.
+    """
+
+    def __init__(self, path: str, lease: float = 120, max_attempts: int = 3, retention: float = 24 * 60 * 60):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+        self.submitted = 0
+        self.claimed = 0
+        self.expired = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Opened on first use, importing the API does not create the file
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def submit(self, request: dict) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO jobs (id, status, request, created_at, updated_at) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, json.dumps(request), now, now),
+            )
+        self.submitted += 1
+        return job_id
+
+    def claim(self, worker: str) -> tuple[str, dict] | None:
+        """Lease the oldest queued job, or one whose worker stopped renewing its lease"""
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            # IMMEDIATE takes the write lock up front, two processes cannot claim the same row
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                expired = conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'Worker lost the job too often', updated_at = ? "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                    (now, now, self.max_attempts),
+                ).rowcount
+                row = conn.execute(
+                    "SELECT id, request FROM jobs "
+                    "WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY created_at LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, "
+                        "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        (worker, now + self.lease, now, row[0]),
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        self.expired += expired
+        if row is None:
+            return None
+        self.claimed += 1
+        return row[0], json.loads(row[1])
+
+    def _update(self, job_id: str, worker: str, assignments: str, values: tuple) -> bool:
+        with self._lock:
+            updated = self._connection().execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (*values, time.time(), job_id, worker),
+            ).rowcount
+        return updated == 1
+
+    def renew(self, job_id: str, worker: str) -> bool:
+        return self._update(job_id, worker, "lease_until = ?", (time.time() + self.lease,))
+
+    def progress(self, job_id: str, worker: str, products: list[dict]) -> bool:
+        """Store the products found so far, False when the job is no longer ours"""
+        return self._update(
+            job_id, worker, "products = ?, lease_until = ?", (json.dumps(products), time.time() + self.lease)
+        )
+
+    def complete(self, job_id: str, worker: str, products: list[dict], next_cursor: str | None) -> bool:
+        return self._update(
+            job_id, worker, "status = 'done', products = ?, next_cursor = ?, lease_until = NULL",
+            (json.dumps(products), next_cursor),
+        )
+
+    def release(self, job_id: str, worker: str) -> bool:
+        return self._update(job_id, worker, "status = 'queued', worker = NULL, lease_until = NULL", ())
+
+    def fail(self, job_id: str, worker: str, error: str) -> bool:
+        return self._update(job_id, worker, "status = 'failed', error = ?, lease_until = NULL", (error,))
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT id, status, products, next_cursor, error, attempts, created_at, updated_at "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return Job(
+            id=row[0], status=row[1], products=json.loads(row[2]), next_cursor=row[3], error=row[4],
+            attempts=row[5], created_at=row[6], updated_at=row[7],
+        )
+
+    def updated_at(self, job_id: str) -> float | None:
+        """Cheap check for pollers, the products are only read when this changed"""
+        with self._lock:
+            row = self._connection().execute("SELECT updated_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def purge(self) -> int:
+        """Drop finished jobs older than `retention`"""
+        with self._lock:
+            return self._connection().execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND updated_at < ?",
+                (time.time() - self.retention,),
+            ).rowcount
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> dict:
+        counts = {}
+        # Scraping the stats must not create the file when nobody uses jobs
+        if self._conn is not None or os.path.exists(self.path):
+            with self._lock:
+                counts = dict(self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            "queued": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "done": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+            "submitted": self.submitted,
+            "claimed": self.claimed,
+            "expired": self.expired,
+        }
+
+
+job_queue = JobQueue(JOBS_PATH, lease=JOBS_LEASE, max_attempts=JOBS_MAX_ATTEMPTS, retention=JOBS_RETENTION)
@@ -0,0 +1,133 @@
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable
+
+from prometheus_client import REGISTRY, Counter, Histogram, Info
+from prometheus_client.core import GaugeMetricFamily
+
+
+STAGE_SECONDS = Histogram(
+    "product_agent_stage_seconds",
+    "Duration of the stages of the /get pipeline",
+    ["stage"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+HARDCODED_FALLBACKS = Counter(
+    "product_agent_hardcoded_fallbacks_total",
+    "Listings answered by the hardcoded connector, by the outcome of the connector before it",
+    ["reason"],
+)
+
+CONNECTOR_RESULTS = Counter(
+    "product_agent_connector_results_total",
+    "Searches per connector by outcome: ok, deferred, timeout or error",
+    ["connector", "outcome"],
+)
+
+BLOCKED_REQUESTS = Counter(
+    "product_agent_browser_blocked_requests_total",
+    "Browser requests aborted by the resource policy",
+    ["resource_type"],
+)
+
+RECEIVED_BYTES = Counter(
+    "product_agent_browser_received_bytes_total",
+    "Content-Length of the responses the browser did load",
+)
+
+RESOURCE_POLICY = Info(
+    "product_agent_browser_resource_policy",
+    "Resource policy and readiness condition of browser pages",
+)
+
+# Stages of the current request as (name, seconds), None outside of a traced request
+_timings: ContextVar[list[tuple[str, float]] | None] = ContextVar("timings", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(name).observe(elapsed)
+        timings = _timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def timed(name: str):
+    """Decorator recording every call of a sync or async function as stage `name`"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with stage(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def start_trace():
+    """Collect the stages of the current request, tasks spawned from it share the list"""
+    return _timings.set([])
+
+
+def end_trace(token) -> list[tuple[str, float]]:
+    timings = _timings.get() or []
+    _timings.reset(token)
+    return timings
+
+
+def server_timing(timings: list[tuple[str, float]]) -> str:
+    """Format stages as a Server-Timing header, repeated stages are summed up"""
+    totals: dict[str, list[float]] = {}
+    for name, elapsed in timings:
+        total = totals.setdefault(name, [0.0, 0])
+        total[0] += elapsed
+        total[1] += 1
+
+    entries = []
+    for name, (elapsed, count) in totals.items():
+        entry = f"{name};dur={elapsed * 1000:.1f}"
+        if count > 1:
+            entry += f';desc="{count}x"'
+        entries.append(entry)
+    return ", ".join(entries)
+
+
+class StatsCollector:
+    """Exports the numeric values of `stats()` dictionaries as Prometheus gauges"""
+
+    def __init__(self):
+        self._sources: dict[str, Callable[[], dict]] = {}
+
+    def register(self, name: str, stats: Callable[[], dict]):
+        self._sources[name] = stats
+
+    def collect(self):
+        for name, stats in self._sources.items():
+            yield from self._gauges(f"product_agent_{name}", stats())
+
+    def _gauges(self, prefix: str, values: dict):
+        for key, value in values.items():
+            if isinstance(value, dict):
+                yield from self._gauges(f"{prefix}_{key}", value)
+            elif isinstance(value, (int, float)) and not isinstance(value, bool):
+                yield GaugeMetricFamily(f"{prefix}_{key}", f"{key} of {prefix}", value=value)
+
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
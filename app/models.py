@@ -2,7 +2,9 @@ from enum import Enum
 from typing import Literal
 from urllib.parse import quote_plus
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+from app.categories import category_resolver
 
 
 class Dimensions(BaseModel):
@@ -11,6 +13,9 @@ class Dimensions(BaseModel):
     depth: float | int
 
 
+EnrichmentField = Literal["dimensions", "weight", "color", "material", "category", "delivery_time", "description"]
+
+
 class Product(BaseModel):
     name: str
     image_url: str
@@ -25,6 +30,43 @@ class Product(BaseModel):
     rating: float
     delivery_time: str | None = None
     description: str | None = None
+    enrichment: Literal["complete", "failed", "timeout", "skipped"] | None = None
+    """How the detail page fields were filled in, None when they came with the listing"""
+
+
+class ProductDetails(BaseModel):
+    """Fields scraped from a product detail page"""
+    width: int | None = None
+    height: int | None = None
+    depth: int | None = None
+    weight: int | None = None
+    color: str | None = None
+    material: str | None = None
+    category: str | None = None
+    delivery_time: str | None = None
+    description: str | None = None
+
+
+class BatchResult(BaseModel):
+    """Outcome of one sentence of a batch search, either products or an error"""
+    sentence: str
+    products: list[Product] | None = None
+    next_cursor: str | None = None
+    degraded: bool = False
+    """A source failed, missed its deadline or answered with its fallback, see X-Degraded of /get"""
+    error: str | None = None
+
+
+class Job(BaseModel):
+    """A queued search, `products` fill in while a worker runs it"""
+    id: str
+    status: Literal["queued", "running", "done", "failed"]
+    products: list[Product] = []
+    next_cursor: str | None = None
+    error: str | None = None
+    attempts: int = 0
+    created_at: float
+    updated_at: float
 
 
 rating_query = {
@@ -72,6 +114,16 @@ class Filters(BaseModel):
 
     color: str | None = None
 
+    # The enum is filled in whenever the schema is built, the LLM sees reloaded categories at once
+    category: str | None = Field(default=None, json_schema_extra=lambda schema: schema.update(enum=category_resolver.keys))
+    """home24 category of a category search, sofas and couches when None"""
+
+    @field_validator("category")
+    @classmethod
+    def resolve_category(cls, value: str | None) -> str | None:
+        # Names and synonyms become category keys, unknown categories fall back to the default
+        return category_resolver.resolve(value)
+
     @property
     def is_product_search(self):
         return self.product_name is not None
@@ -0,0 +1,45 @@
+import base64
+import json
+
+from pydantic import ValidationError
+
+from app.models import Filters
+
+
+# Same bounds as the limit query parameter
+MAX_LIMIT = 100
+
+
+def encode_cursor(filters: Filters, limit: int, offset: int) -> str:
+    """Opaque token holding everything needed to fetch a page without the sentence"""
+    payload = {
+        "filters": filters.model_dump(exclude_defaults=True),
+        "limit": limit,
+        "offset": offset,
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[Filters, int, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        filters = Filters.model_validate(payload["filters"])
+        limit, offset = int(payload["limit"]), int(payload["offset"])
+    except (ValueError, KeyError, TypeError, ValidationError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+    # A cursor is client input, it must not get around the bounds of the query parameters
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"Invalid cursor: limit must be between 1 and {MAX_LIMIT}")
+    if offset < 0:
+        raise ValueError("Invalid cursor: offset must not be negative")
+    return filters, limit, offset
+
+
+def next_cursor(filters: Filters, limit: int, offset: int, received: int) -> str | None:
+    # A short page means upstream has nothing more to give
+    if received < limit:
+        return None
+    return encode_cursor(filters, limit, offset + received)
@@ -0,0 +1,440 @@
+import json
+import re
+
+from lxml import etree, html as lxml_html
+
+from app.constants import PARSER_BACKEND
+from app.models import ProductDetails
+
+
+DIMENSION_LABELS = {
+    "Tiefe": "depth",
+    "Höhe": "height",
+    "Breite": "width",
+    "Gewicht": "weight"
+}
+
+NUMBER_PATTERN = re.compile(r'\d+')
+MATERIAL_PATTERN = re.compile(r'Material')
+DELIVERY_PATTERN = re.compile(r'Lieferung')
+
+CATEGORY_CLASS = "emotion-cache-12rx5a3"
+
+
+def extract_product_details(html: str, backend: str | None = None) -> ProductDetails:
+    """Extract every detail page field with the configured parser backend"""
+    backend = backend or PARSER_BACKEND
+    return PARSERS[backend](html)
+
+
+def parse_product_page(html: str) -> ProductDetails:
+    """Detail page fields scraped from the DOM, the embedded page state only fills its gaps"""
+    tree = lxml_html.fromstring(html)
+    # The lxml backend reuses the tree that is also read for the page state
+    scraped = _scrape_tree(tree) if PARSER_BACKEND == "lxml" else extract_product_details(html)
+    missing = [field for field, value in scraped if value is None]
+    if not missing:
+        return scraped
+
+    details = _structured_details(tree)
+    if details is None:
+        return scraped
+
+    return scraped.model_copy(update={
+        field: getattr(details, field) for field in missing if getattr(details, field) is not None
+    })
+
+
+# Embedded page state: server rendered pages ship the product as JSON next to the DOM, in the
+# Next.js __NEXT_DATA__ script, an Apollo cache assignment or schema.org JSON-LD. Reading it only
+# needs the raw HTML, so it works without rendering the page.
+
+STRUCTURED_KEYS = {
+    "width": ("width", "breite"),
+    "height": ("height", "hoehe", "höhe"),
+    "depth": ("depth", "tiefe"),
+    "weight": ("weight", "gewicht"),
+    "color": ("color", "colour", "farbe"),
+    "material": ("material",),
+    "category": ("category", "categoryname"),
+    "delivery_time": ("deliverytime", "delivery_time", "deliverytimetext", "deliveryleadtime"),
+    "description": ("description",),
+}
+NUMERIC_KEYS = ("width", "height", "depth", "weight")
+
+# Objects hanging off the product that describe something else, an image's width or a brand's
+# description is never the product's
+FOREIGN_KEYS = frozenset((
+    "image", "images", "thumbnail", "logo", "video", "media", "brand", "manufacturer", "offers",
+    "seller", "review", "reviews", "aggregaterating", "recommendations", "isrelatedto", "issimilarto",
+))
+# Nested objects holding the product's own measurements
+DIMENSION_KEYS = frozenset(("dimensions", "measurements", "size"))
+
+# schema.org unitCode (UN/CEFACT) and unitText values, as factors to cm and kg
+LENGTH_UNITS = {"cmt": 1, "cm": 1, "mmt": 0.1, "mm": 0.1, "mtr": 100, "m": 100, "inh": 2.54, "in": 2.54}
+WEIGHT_UNITS = {"kgm": 1, "kg": 1, "grm": 0.001, "g": 0.001, "lbr": 0.45359237, "lb": 0.45359237}
+
+DECIMAL_PATTERN = re.compile(r'\d+(?:[.,]\d+)?')
+
+_STATE_SCRIPTS = etree.XPath(
+    '//script[@id="__NEXT_DATA__" or @type="application/ld+json" or contains(text(), "__APOLLO_STATE__")]'
+)
+_KEY_TO_FIELD = {alias: field for field, aliases in STRUCTURED_KEYS.items() for alias in aliases}
+
+
+def extract_structured_details(html: str) -> ProductDetails | None:
+    """Detail fields from the JSON embedded in the page, None when there is none"""
+    try:
+        tree = lxml_html.fromstring(html)
+    except (etree.ParserError, ValueError):
+        return None
+    return _structured_details(tree)
+
+
+def _structured_details(tree) -> ProductDetails | None:
+    documents = [document for script in _STATE_SCRIPTS(tree) if (document := _load_state(script.text or "")) is not None]
+    product = _find_product(documents)
+    if product is None:
+        return None
+
+    values = {}
+    _read_fields(product, values)
+    for key, value in product.items():
+        if key.lower() in DIMENSION_KEYS and isinstance(value, dict):
+            _read_fields(value, values)
+        elif key == "additionalProperty" and isinstance(value, list):
+            # schema.org PropertyValue entries such as {"name": "Breite", "value": 178, "unitCode": "CMT"}
+            for prop in value:
+                if isinstance(prop, dict) and isinstance(prop.get("name"), str):
+                    field = _KEY_TO_FIELD.get(prop["name"].lower())
+                    if field is not None and values.get(field) is None:
+                        values[field] = _structured_value(field, {k: v for k, v in prop.items() if k != "name"})
+
+    values = {field: value for field, value in values.items() if value is not None}
+    return ProductDetails(**values) if values else None
+
+
+def _find_product(documents: list) -> dict | None:
+    # JSON-LD names the product, only top level nodes and @graph entries can be it
+    for document in documents:
+        for node in document if isinstance(document, list) else [document, *document.get("@graph", [])]:
+            if isinstance(node, dict) and _is_product(node):
+                return node
+
+    # Page state is untyped, the product is the object with the most known keys
+    nodes = [node for document in documents for node in _iter_objects(document)]
+    product = max(nodes, key=_score, default=None)
+    if product is None or _score(product) < 2:
+        return None
+    return product
+
+
+def _is_product(node: dict) -> bool:
+    kind = node.get("@type")
+    return kind == "Product" or (isinstance(kind, list) and "Product" in kind)
+
+
+def _read_fields(node: dict, values: dict):
+    for key, value in node.items():
+        field = _KEY_TO_FIELD.get(key.lower())
+        if field is None or values.get(field) is not None:
+            continue
+        values[field] = _structured_value(field, value)
+
+
+def _load_state(text: str):
+    text = text.strip()
+    if "__APOLLO_STATE__" in text:
+        start = text.find("{", text.index("__APOLLO_STATE__"))
+        if start == -1:
+            return None
+        text = text[start:]
+
+    try:
+        return json.JSONDecoder().raw_decode(text)[0]
+    except json.JSONDecodeError:
+        return None
+
+
+def _iter_objects(document):
+    """Every object of the document except typed non-product nodes and what hangs off FOREIGN_KEYS"""
+    stack = [document]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if "@type" in node and not _is_product(node):
+                continue
+            yield node
+            stack.extend(reversed([value for key, value in node.items() if key.lower() not in FOREIGN_KEYS]))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+
+def _score(node: dict) -> int:
+    keys = [key.lower() for key in node]
+    for key, value in node.items():
+        if key.lower() in DIMENSION_KEYS and isinstance(value, dict):
+            keys.extend(nested.lower() for nested in value)
+    return len({_KEY_TO_FIELD[key] for key in keys if key in _KEY_TO_FIELD})
+
+
+def _structured_value(field: str, value):
+    # schema.org wraps values as {"value": .., "unitCode": ..} or {"name": ..}, lists hold one entry per variant
+    if isinstance(value, list):
+        value = value[0] if value else None
+    unit = None
+    if isinstance(value, dict):
+        unit = value.get("unitCode") or value.get("unitText") or value.get("unit")
+        value = value.get("value", value.get("name"))
+
+    if value is None or isinstance(value, (dict, list, bool)):
+        return None
+
+    if field in NUMERIC_KEYS:
+        return _quantity(field, value, unit)
+
+    text = str(value).strip()
+    return text or None
+
+
+def _quantity(field: str, value, unit: str | None) -> int | None:
+    """`value` in cm, or kg for the weight; None when its unit is unknown"""
+    if isinstance(value, (int, float)):
+        number, rest = float(value), ""
+    else:
+        match = DECIMAL_PATTERN.search(str(value))
+        if match is None:
+            return None
+        number, rest = float(match.group(0).replace(",", ".")), str(value)[match.end():].split()
+        rest = rest[0] if rest else ""
+
+    unit = str(unit or rest).strip().lower()
+    if not unit:
+        # Bare numbers are in the units of the shop, cm and kg
+        return round(number)
+
+    factor = (WEIGHT_UNITS if field == "weight" else LENGTH_UNITS).get(unit)
+    return round(number * factor) if factor is not None else None
+
+
+# lxml backend: one pass over the tree finds the five sections, the fields are then read
+# from those small subtrees with precompiled XPath expressions
+
+_LEAF_DIV_WITH_TEXT = etree.XPath('.//div[not(*) and text() = $label]')
+_MATERIAL_SPAN = etree.XPath('.//span[not(*) and contains(text(), "Material")]')
+_FIRST_SPAN = etree.XPath('(.//span)[1]')
+_FIRST_UL = etree.XPath('(.//ul)[1]')
+_DELIVERY_DIV = etree.XPath('(.//div[contains(string(.), "Lieferung")])[1]')
+
+
+def _text(element, strip: bool = True) -> str:
+    if strip:
+        return "".join(part.strip() for part in element.itertext())
+    return "".join(element.itertext())
+
+
+def parse_with_lxml(html: str) -> ProductDetails:
+    return _scrape_tree(lxml_html.fromstring(html))
+
+
+def _scrape_tree(tree) -> ProductDetails:
+    dimensions = None
+    details = None
+    category = None
+    delivery = None
+    description = None
+
+    for element in tree.iter("div", "section", "ol"):
+        tag = element.tag
+        if tag == "div":
+            if dimensions is None and element.get("data-section-name") == "product_dimensions":
+                dimensions = element
+            elif description is None and element.get("id") == "accordion-section-region-product_description":
+                description = element
+        elif tag == "section":
+            testid = element.get("data-testid")
+            if details is None and testid == "section-content-product_details":
+                details = element
+            elif delivery is None and testid == "delivery-time-notice":
+                delivery = element
+        elif category is None and CATEGORY_CLASS in (element.get("class") or "").split():
+            category = element
+
+        if dimensions is not None and details is not None and category is not None \
+                and delivery is not None and description is not None:
+            break
+
+    result = ProductDetails()
+
+    if dimensions is not None:
+        for label, key in DIMENSION_LABELS.items():
+            labels = _LEAF_DIV_WITH_TEXT(dimensions, label=label)
+            if not labels:
+                continue
+            value = labels[0].getnext()
+            if value is None:
+                continue
+            number = NUMBER_PATTERN.search(_text(value))
+            if number:
+                setattr(result, key, int(number.group(0)))
+
+    if details is not None:
+        material = _MATERIAL_SPAN(details)
+        if material:
+            result.material = _text(material[0]).split(":")[1].strip()
+
+        color_label = _LEAF_DIV_WITH_TEXT(details, label="Farbe")
+        if color_label:
+            ul = _FIRST_UL(color_label[0].getparent())
+            if ul:
+                span = _FIRST_SPAN(ul[0])
+                if span:
+                    result.color = _text(span[0])
+
+    if category is not None and len(category):
+        span = _FIRST_SPAN(category[-1])
+        if span:
+            result.category = _text(span[0])
+
+    if delivery is not None:
+        delivery_div = _DELIVERY_DIV(delivery)
+        if delivery_div:
+            result.delivery_time = _text(delivery_div[0]).split(":")[1].strip()
+
+    if description is not None:
+        result.description = _text(description, strip=False)
+
+    return result
+
+
+# BeautifulSoup backend: the original per-field extractors, each scanning the whole tree
+
+def parse_with_bs4(html: str) -> ProductDetails:
+    # Only this backend needs bs4, the default lxml one never loads it
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+
+    dimension_dict = extract_dimensions(soup)
+    color_and_material_dict = extract_color_and_material(soup)
+
+    return ProductDetails(
+        **dimension_dict,
+        color=color_and_material_dict["color"],
+        material=color_and_material_dict["material"],
+        category=extract_category_name(soup),
+        delivery_time=extract_delivery_time(soup),
+        description=extract_description(soup),
+    )
+
+
+def extract_dimensions(soup):
+    main_section = soup.find('div', attrs={'data-section-name': "product_dimensions"})
+
+    data = {
+        "width": None,
+        "height": None,
+        "depth": None,
+        "weight": None
+    }
+
+    if not main_section:
+        return data
+
+    for label, key in DIMENSION_LABELS.items():
+        element = main_section.find('div', string=label)
+
+        if not element:
+            continue
+
+        second_element = element.parent.contents[1]
+        if not second_element:
+            continue
+
+        text = second_element.get_text(strip=True)
+        number = NUMBER_PATTERN.search(text)
+
+        if not number:
+            continue
+
+        data[key] = int(number.group(0))
+
+    return data
+
+
+def extract_color_and_material(soup):
+    data = {
+        "material": None,
+        "color": None
+    }
+
+
+    main_section = soup.find('section', attrs={'data-testid': 'section-content-product_details'})
+    if not main_section:
+        return data
+
+    material_header = main_section.find('span', string=MATERIAL_PATTERN)
+
+    if material_header:
+        text = material_header.get_text(strip=True)
+        data["material"] = text.split(":")[1].strip()
+
+    color_header = main_section.find('div', string='Farbe')
+    if color_header:
+        parent = color_header.parent
+        ul = parent.find('ul')
+        if ul:
+            span = ul.find('span')
+            if span:
+                data["color"] = span.get_text(strip=True)
+
+    return data
+
+
+def extract_category_name(soup):
+    main_section = soup.find('ol', attrs={'class': CATEGORY_CLASS})
+
+    if not main_section:
+        return None
+
+    last_li = main_section.contents[-1]
+
+    if not last_li:
+        return None
+
+    span = last_li.find('span')
+    if not span:
+        return None
+
+    return span.get_text(strip=True)
+
+
+def extract_delivery_time(soup):
+    main_section = soup.find('section', attrs={'data-testid': 'delivery-time-notice'})
+
+    if not main_section:
+        return None
+
+    delivery_div = main_section.find(lambda tag: tag.name == 'div' and DELIVERY_PATTERN.search(tag.get_text()))
+
+    if not delivery_div:
+        return None
+
+    text = delivery_div.get_text(strip=True)
+    delivery_time = text.split(":")[1].strip()
+    return delivery_time
+
+
+def extract_description(soup):
+    main_section = soup.find('div', attrs={'id': "accordion-section-region-product_description"})
+    if not main_section:
+        return None
+
+    return main_section.get_text()
+
+
+PARSERS = {
+    "lxml": parse_with_lxml,
+    "bs4": parse_with_bs4,
+}
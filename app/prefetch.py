@@ -0,0 +1,84 @@
+import asyncio
+import logging
+
+from app.browser import browser_pool
+from app.constants import PREFETCH_CONCURRENCY, PREFETCH_ENABLED, PREFETCH_MAX_PENDING
+from app.extractions import get_product_list
+from app.models import Filters
+from app.scheduler import BACKGROUND, fetch_priority
+
+
+logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    """Warms the listing and detail caches with the page a client will most likely ask for next.
+
+    Prefetches run in the background with their own small concurrency limit and a global
+    budget of pending pages. They are skipped while the browser pool has no idle page, so
+    user facing requests always go first.
+    """
+
+    def __init__(self, enabled: bool = False, concurrency: int = 1, max_pending: int = 8):
+        self.enabled = enabled
+        self.max_pending = max_pending
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._pending: dict[str, asyncio.Task] = {}
+
+        self.scheduled = 0
+        self.completed = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def schedule_next_page(self, filters: Filters, limit: int, offset: int):
+        if not self.enabled or filters.is_floors_search:
+            return
+
+        key = f"{filters.model_dump_json()}|{limit}|{offset}"
+        if key in self._pending:
+            return
+
+        if len(self._pending) >= self.max_pending or browser_pool.waiting > 0:
+            self.dropped += 1
+            return
+
+        self.scheduled += 1
+        task = asyncio.create_task(self._prefetch(filters.model_copy(), limit, offset))
+        self._pending[key] = task
+        task.add_done_callback(lambda _: self._pending.pop(key, None))
+
+    async def close(self):
+        tasks = list(self._pending.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": int(self.enabled),
+            "pending": len(self._pending),
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+    async def _prefetch(self, filters: Filters, limit: int, offset: int):
+        fetch_priority.set(BACKGROUND)
+        async with self._semaphore:
+            # Give way if user requests started to queue for the browser meanwhile
+            if browser_pool.waiting > 0:
+                self.dropped += 1
+                return
+            try:
+                await get_product_list(filters, limit=limit, offset=offset)
+            except Exception as e:
+                self.failed += 1
+                logger.warning("Prefetch of offset %s failed: %s", offset, e)
+                return
+
+        self.completed += 1
+        logger.info("Prefetched %s, offset: %s, limit: %s", filters.to_query_params(), offset, limit)
+
+
+prefetcher = Prefetcher(enabled=PREFETCH_ENABLED, concurrency=PREFETCH_CONCURRENCY, max_pending=PREFETCH_MAX_PENDING)
@@ -0,0 +1,261 @@
+import logging
+import re
+
+from app.categories import category_resolver
+from app.models import Filters
+
+
+logger = logging.getLogger(__name__)
+
+
+NUMBER = r"(\d+(?:[.,]\d+)?)"
+# 1.000 and 1,000 are thousands, 1.000,50 and 1,000.50 carry cents
+PRICE = r"(\d{1,3}(?:\.\d{3})+(?:,\d{1,2})?|\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:[.,]\d{1,2})?)(?![\d.,]*\d)"
+UNIT = r"\s*(mm|cm|m|meters?|metres?)\b"
+CURRENCY = r"\s*(?:€|eur\b|euros?\b)"
+OPTIONAL_CURRENCY = rf"(?:{CURRENCY})?"
+# A bare "from 2019" is no price, without a currency the number needs one of these in front
+PRICE_NOUN = r"(?:price[sd]?|costs?|costing|budget|preis)\s+(?:of\s+|is\s+)?"
+
+MIN_PHRASE = r"(?:more than|at least|over|above|min(?:imum)?|from)"
+MAX_PHRASE = r"(?:less than|at most|no more than|up to|under|below|max(?:imum)?|unter|bis)"
+
+DIMENSIONS = {
+    "width": ("wider", "narrower", "wide", r"width|breite"),
+    "height": ("taller|higher", "shorter|lower", "tall|high", r"height|höhe"),
+    "depth": ("deeper", "shallower", "deep", r"depth|tiefe"),
+}
+
+COLORS = {
+    "green": "green", "grün": "green", "gruen": "green",
+    "grey": "grey", "gray": "grey", "grau": "grey",
+    "blue": "blue", "blau": "blue",
+    "red": "red", "rot": "red",
+    "black": "black", "schwarz": "black",
+    "white": "white", "weiß": "white", "weiss": "white",
+    "beige": "beige",
+    "brown": "brown", "braun": "brown",
+    "yellow": "yellow", "gelb": "yellow",
+    "orange": "orange",
+    "pink": "pink", "rosa": "pink",
+    "purple": "purple", "lila": "purple",
+    "anthracite": "anthracite", "anthrazit": "anthracite",
+    "cream": "cream", "creme": "cream",
+    "taupe": "taupe",
+}
+
+SORTS = {
+    "prices_low_to_high": ["cheapest ones first", "cheapest first", "cheapest", "cheap", "lowest price first",
+                           "lowest price", "price low to high", "price ascending", "günstigste zuerst", "günstigste"],
+    "prices_high_to_low": ["most expensive first", "most expensive", "highest price first", "highest price",
+                           "price high to low", "price descending", "teuerste zuerst"],
+    "sort_by_popularity": ["most popular first", "most popular", "popular", "bestsellers", "best sellers", "beliebteste"],
+    "sort_by_rating": ["best rated", "highest rated", "top rated", "best reviewed"],
+    "new_ones_first": ["new ones first", "newest first", "newest", "latest", "new arrivals", "neueste"],
+    "sort_by_discount": ["biggest discount", "best deals", "on sale", "discounted", "reduziert"],
+}
+
+# Phrases for the enum fields of Filters, on top of the lowercased enum values themselves
+ENUM_SYNONYMS = {
+    "material": {
+        "leather": "realleather", "real leather": "realleather", "genuine leather": "realleather",
+        "faux leather": "syntheticleather", "fake leather": "syntheticleather",
+        "synthetic leather": "syntheticleather", "vegan leather": "syntheticleather",
+        "solid wood": "solidwood", "engineered wood": "engineeredWood", "natural fiber": "naturalfiber",
+        "natural fibre": "naturalfiber", "rattan": "naturalfiber", "fabric": "textile", "leder": "realleather",
+    },
+    "textile": {
+        "bouclé": "boucle", "corduroy": "cord", "fake fur": "fakeFur", "faux fur": "fakeFur", "denim": "jeans",
+        "microfibre": "microfiber", "polyamide": "polyamid", "teddy": "teddyFabric", "terry": "terrycloth",
+        "samt": "velvet", "wolle": "wool", "leinen": "linen", "baumwolle": "cotton",
+    },
+    "style": {
+        "modern": "modernStyle", "country": "newCountry", "country style": "newCountry", "nordic": "scandinavian",
+        "skandinavisch": "scandinavian",
+    },
+    "shape": {"l-shaped": "lshaped", "l shaped": "lshaped", "corner": "lshaped"},
+    "pattern": {
+        "floral": "flowered", "patterned": "motif", "plain": "unicolored", "single colour": "unicolored",
+        "single color": "unicolored", "wood look": "woodLook", "wood effect": "woodLook",
+    },
+}
+
+FLOOR_WORDS = r"floors?|flooring|laminate|laminat|parquet|parkett|vinyl floor|boden|bodenbelag"
+
+# Words that carry no filter on their own, a sentence is fully understood once only these are left
+FILLER = set("""
+    show me give find get search searching look looking for i we want need would like please list of the a an
+    some any all with in and or that are is which ones one first sorted sort by order ordered only also
+    sofa sofas couch couches settee settees seat seater products product items options ones color colour
+    colored coloured price prices priced cost costs budget stars star rated rating
+    zeige mir bitte die der das ein eine mit und in für
+""".split())
+
+
+def _to_cm(value: str, unit: str) -> int:
+    number = float(value.replace(",", "."))
+    if unit == "mm":
+        number /= 10
+    elif unit != "cm":
+        number *= 100
+    return int(round(number))
+
+
+def _to_price(value: str) -> int:
+    # Whatever separator is followed by one or two digits marks the cents, the others group thousands
+    integer, cents = re.fullmatch(r"([\d.,]+?)(?:[.,](\d{1,2}))?", value).groups()
+    return int(round(float(re.sub(r"[.,]", "", integer) + "." + (cents or "0"))))
+
+
+def _phrases(phrases) -> str:
+    return "|".join(re.escape(phrase) for phrase in sorted(phrases, key=len, reverse=True))
+
+
+class RuleParser:
+    """Deterministic parser for simple sentences, answers None unless every word is understood.
+
+    Every rule consumes the part of the sentence it understood. When anything besides filler
+    words is left over the sentence goes to the LLM instead.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+        self._enum_phrases = {}
+        for field, synonyms in ENUM_SYNONYMS.items():
+            values = Filters.model_fields[field].json_schema_extra["enum"]
+            phrases = {value.lower(): value for value in values}
+            for phrase, value in synonyms.items():
+                assert value in values, f"{value} is not an enum value of Filters.{field}"
+                phrases[phrase] = value
+            self._enum_phrases[field] = phrases
+
+        self._sort_phrases = {phrase: flag for flag, phrases in SORTS.items() for phrase in phrases}
+
+        self._sort_pattern = re.compile(rf"\b({_phrases(self._sort_phrases)})\b")
+        self._color_pattern = re.compile(rf"(?<![\w-])({_phrases(COLORS)})(?![\w-])")
+        self._enum_patterns = {
+            field: re.compile(rf"(?<![\w-])({_phrases(phrases)})(?![\w-])")
+            for field, phrases in self._enum_phrases.items()
+        }
+        self._floor_pattern = re.compile(rf"\b({FLOOR_WORDS})\b")
+        self._rating_pattern = re.compile(
+            r"\b(?:rated\s+)?(?:at least\s+|min(?:imum)?\s+)?([2-5])\s*(?:stars?|★)(?:\s*(?:and up|or more|and more|or higher|\+))?"
+            r"|\brated\s+(?:at least\s+)?([2-5])\b(?:\s*(?:and up|or more|or higher|\+))?"
+        )
+        self._dimension_patterns = []
+        for field, (more, less, adjective, noun) in DIMENSIONS.items():
+            self._dimension_patterns += [
+                (field, re.compile(rf"\b(?:{noun})\s+between\s+{NUMBER}(?:{UNIT})?\s+(?:and|to|-)\s+{NUMBER}{UNIT}"), "range"),
+                (field, re.compile(rf"\b(?:{more})\s+than\s+{NUMBER}{UNIT}"), "min"),
+                (field, re.compile(rf"\b(?:{less})\s+than\s+{NUMBER}{UNIT}"), "max"),
+                (field, re.compile(rf"\b(?:{noun})\s+(?:of\s+)?{MIN_PHRASE}\s+{NUMBER}{UNIT}"), "min"),
+                (field, re.compile(rf"\b(?:{noun})\s+(?:of\s+)?{MAX_PHRASE}\s+{NUMBER}{UNIT}"), "max"),
+                (field, re.compile(rf"\b{MIN_PHRASE}\s+{NUMBER}{UNIT}\s+(?:{adjective})\b"), "min"),
+                (field, re.compile(rf"\b{MAX_PHRASE}\s+{NUMBER}{UNIT}\s+(?:{adjective})\b"), "max"),
+            ]
+        self._price_patterns = [
+            (re.compile(rf"\bbetween\s+{PRICE}{OPTIONAL_CURRENCY}\s+(?:and|to|-)\s+{PRICE}{OPTIONAL_CURRENCY}"), "range"),
+            (re.compile(rf"\b{PRICE}\s*-\s*{PRICE}{CURRENCY}"), "range"),
+            (re.compile(rf"\b(?:{PRICE_NOUN}{MAX_PHRASE}\s+{PRICE}{OPTIONAL_CURRENCY}|cheaper than\s+{PRICE}{OPTIONAL_CURRENCY})"), "max"),
+            (re.compile(rf"\b{MAX_PHRASE}\s+{PRICE}{CURRENCY}"), "max"),
+            (re.compile(rf"\b{PRICE}{CURRENCY}\s*(?:or less|max|and below|or cheaper)"), "max"),
+            (re.compile(rf"\b(?:{PRICE_NOUN}{MIN_PHRASE}\s+{PRICE}{OPTIONAL_CURRENCY}|more expensive than\s+{PRICE}{OPTIONAL_CURRENCY})"), "min"),
+            (re.compile(rf"\b{MIN_PHRASE}\s+{PRICE}{CURRENCY}"), "min"),
+        ]
+
+    def parse(self, sentence: str) -> Filters | None:
+        filters = self._parse(sentence)
+        if filters is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            logger.info("Fast path understood %r", sentence)
+        return filters
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+    def _parse(self, sentence: str) -> Filters | None:
+        text = " ".join(sentence.lower().split())
+        fields = {}
+
+        def consume(match: re.Match) -> str:
+            return " " * len(match.group(0))
+
+        for field, pattern, kind in self._dimension_patterns:
+            for match in pattern.finditer(text):
+                if kind == "range":
+                    low_unit = match.group(2) or match.group(4)
+                    fields[f"{field}_min"] = _to_cm(match.group(1), low_unit)
+                    fields[f"{field}_max"] = _to_cm(match.group(3), match.group(4))
+                else:
+                    fields[f"{field}_{kind}"] = _to_cm(match.group(1), match.group(2))
+            text = pattern.sub(consume, text)
+
+        for match in self._rating_pattern.finditer(text):
+            fields["average_rating"] = int(match.group(1) or match.group(2))
+        text = self._rating_pattern.sub(consume, text)
+
+        for pattern, kind in self._price_patterns:
+            for match in pattern.finditer(text):
+                numbers = [group for group in match.groups() if group is not None]
+                if kind == "range":
+                    fields["price_min"] = _to_price(numbers[0])
+                    fields["price_max"] = _to_price(numbers[1])
+                else:
+                    fields[f"price_{kind}"] = _to_price(numbers[0])
+            text = pattern.sub(consume, text)
+
+        sort_flags = {self._sort_phrases[match.group(1)] for match in self._sort_pattern.finditer(text)}
+        if len(sort_flags) > 1:
+            return None
+        fields.update({flag: True for flag in sort_flags})
+        text = self._sort_pattern.sub(consume, text)
+
+        colors = {COLORS[match.group(1)] for match in self._color_pattern.finditer(text)}
+        if len(colors) > 1:
+            return None
+        if colors:
+            fields["color"] = colors.pop()
+        text = self._color_pattern.sub(consume, text)
+
+        for field, pattern in self._enum_patterns.items():
+            values = {self._enum_phrases[field][match.group(1)] for match in pattern.finditer(text)}
+            if len(values) > 1:
+                return None
+            if values:
+                fields[field] = values.pop()
+            text = pattern.sub(consume, text)
+
+        # Longest synonyms win, so "floor lamps" is a category and not a floors search
+        categories = category_resolver.find(text)
+        if len({key for _, _, key in categories}) > 1:
+            return None
+        if categories:
+            fields["category"] = categories[0][2]
+            for start, end, _ in categories:
+                text = text[:start] + " " * (end - start) + text[end:]
+
+        if self._floor_pattern.search(text):
+            fields["is_floors_search"] = True
+            text = self._floor_pattern.sub(consume, text)
+
+        # A color already describes the look, the pattern has to stay empty then
+        if "color" in fields:
+            fields.pop("pattern", None)
+
+        leftover = [word for word in re.findall(r"[^\W_]+", text) if word not in FILLER]
+        if leftover or not fields:
+            return None
+
+        return Filters(**fields)
+
+
+rule_parser = RuleParser()
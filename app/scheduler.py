@@ -0,0 +1,202 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Awaitable, Callable, TypeVar
+from urllib.parse import urlsplit
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+# Lower runs first. Background work (prefetch, cache refresh) sets BACKGROUND in its own task
+USER = 0
+BACKGROUND = 1
+
+fetch_priority: ContextVar[int] = ContextVar("fetch_priority", default=USER)
+
+
+class CircuitOpen(Exception):
+    """Upstream keeps answering with block pages, requests are refused until the cooldown ends"""
+
+
+class PrioritySemaphore:
+    """Semaphore whose waiters are woken lowest priority value first, FIFO within a priority"""
+
+    def __init__(self, value: int):
+        self._value = value
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    async def acquire(self, priority: int = USER):
+        if self._value > 0 and not self.waiting:
+            self._value -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Woken up and cancelled at the same time, hand the slot to the next waiter
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._value += 1
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    async def take(self):
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class CircuitBreaker:
+    """Opens after `threshold` block pages in a row.
+
+    Once `cooldown` seconds passed a single trial request is let through, a success closes
+    the circuit again and another block page keeps it open for the next cooldown.
+    """
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+
+        now = time.monotonic()
+        if now - self._opened_at < self.cooldown:
+            return False
+        self._opened_at = now
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self._opened_at = None
+
+    def record_block(self):
+        self.failures += 1
+        if self.failures >= self.threshold:
+            if self._opened_at is None:
+                logger.warning("Circuit opened after %s block pages in a row", self.failures)
+            self._opened_at = time.monotonic()
+
+
+class FetchScheduler:
+    """Central gate for every upstream request.
+
+    A global priority semaphore bounds the requests in flight, a token bucket per host keeps
+    the request rate below the bot protection limits, errors in `retry_on` are retried with
+    jittered exponential backoff. Errors in `block_on` are blocks that would only come
+    back on a retry, they are raised at once and feed a circuit breaker per host.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 8,
+        host_rate: float = 4,
+        host_burst: int = 8,
+        retries: int = 2,
+        backoff: float = 0.5,
+        circuit_threshold: int = 5,
+        circuit_cooldown: float = 60,
+        retry_on: tuple[type[Exception], ...] = (),
+        block_on: tuple[type[Exception], ...] = (),
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.retry_on = retry_on
+        self.block_on = block_on
+        self._slots = PrioritySemaphore(concurrency)
+        self._buckets = defaultdict(lambda: TokenBucket(host_rate, host_burst))
+        self._breakers = defaultdict(lambda: CircuitBreaker(circuit_threshold, circuit_cooldown))
+
+        self.in_flight = 0
+        self.completed = 0
+        self.retried = 0
+        self.rejected = 0
+
+    async def run(self, url: str, operation: Callable[[], Awaitable[T]], priority: int | None = None) -> T:
+        host = urlsplit(url).netloc
+        breaker = self._breakers[host]
+        priority = fetch_priority.get() if priority is None else priority
+
+        for attempt in range(self.retries + 1):
+            if not breaker.allow():
+                self.rejected += 1
+                raise CircuitOpen(host)
+
+            await self._slots.acquire(priority)
+            self.in_flight += 1
+            try:
+                await self._buckets[host].take()
+                result = await operation()
+            except self.retry_on + self.block_on as e:
+                if isinstance(e, self.block_on):
+                    breaker.record_block()
+                    raise
+                if attempt == self.retries:
+                    raise
+                error = e
+            else:
+                breaker.record_success()
+                self.completed += 1
+                return result
+            finally:
+                self.in_flight -= 1
+                self._slots.release()
+
+            delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+            self.retried += 1
+            logger.info("Retrying %s in %.2f s after %s: %s", host, delay, type(error).__name__, error)
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self._slots.waiting,
+            "completed": self.completed,
+            "retried": self.retried,
+            "rejected": self.rejected,
+            "open_circuits": sum(breaker.is_open for breaker in self._breakers.values()),
+        }
@@ -0,0 +1,38 @@
+import asyncio
+from typing import Awaitable, Callable, TypeVar
+
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one execution of the operation.
+
+    The first caller starts the operation, everyone arriving while it runs awaits the same
+    result. The operation is shielded, so a caller that goes away does not cancel it for
+    the others.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Task] = {}
+        self.executed = 0
+        self.shared = 0
+
+    async def do(self, key: str, operation: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(operation())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+            self.executed += 1
+        else:
+            self.shared += 1
+
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls),
+            "executed": self.executed,
+            "shared": self.shared,
+        }
@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.constants import PARSE_WORKERS
+from app.metrics import stage
+from app.models import ProductDetails
+from app.parsing import parse_product_page
+
+
+logger = logging.getLogger(__name__)
+
+
+WARM_UP_HTML = "<html><body><div data-section-name='product_dimensions'></div></body></html>"
+
+
+def _warm_up(_) -> int:
+    # Imports lxml, bs4 and pydantic in the worker and runs the parser once
+    parse_product_page(WARM_UP_HTML)
+    return os.getpid()
+
+
+class ParsePool:
+    """Runs detail page parsing in worker processes so it never blocks the event loop.
+
+    Inputs and outputs are a html string and a ProductDetails, both cheap to pickle. With
+    `workers=0` pages are parsed inline, a crashed pool is replaced on the next parse. Every
+    parse is timed here as stage detail_parse, metrics recorded inside a worker never reach /metrics.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: ProcessPoolExecutor | None = None
+        self._warming: asyncio.Task | None = None
+
+        self.pending = 0
+        self.parsed = 0
+        self.inline = 0
+        self.restarts = 0
+
+    async def start(self):
+        if self.workers <= 0 or self._executor is not None:
+            return
+
+        # Workers are spawned, forking a process with a running event loop and open sockets is unsafe
+        self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        # Warming up does not hold back startup, parses submitted meanwhile queue behind it
+        self._warming = asyncio.create_task(self._warm_up(self._executor))
+
+    async def _warm_up(self, executor: ProcessPoolExecutor):
+        loop = asyncio.get_running_loop()
+        try:
+            pids = await asyncio.gather(*(
+                loop.run_in_executor(executor, _warm_up, index) for index in range(self.workers)
+            ))
+        except BrokenProcessPool as e:
+            logger.error("Parse pool failed to start: %s", e)
+            return
+        logger.info("Parse pool ready with %s workers", len(set(pids)))
+
+    async def close(self):
+        if self._warming is not None:
+            await asyncio.gather(self._warming, return_exceptions=True)
+            self._warming = None
+        if self._executor is not None:
+            # Without waiting, workers that were still starting up can outlive the app
+            await asyncio.to_thread(self._executor.shutdown, wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def parse(self, html: str) -> ProductDetails:
+        if self._executor is None:
+            self.inline += 1
+            with stage("detail_parse"):
+                return parse_product_page(html)
+
+        executor = self._executor
+        self.pending += 1
+        try:
+            with stage("detail_parse"):
+                details = await asyncio.get_running_loop().run_in_executor(executor, parse_product_page, html)
+        except BrokenProcessPool:
+            # Only the first parse that notices the broken pool replaces it
+            if self._executor is executor:
+                logger.error("Parse pool broke, restarting it")
+                self.restarts += 1
+                await self.close()
+                await self.start()
+            self.inline += 1
+            with stage("detail_parse"):
+                return parse_product_page(html)
+        finally:
+            self.pending -= 1
+
+        self.parsed += 1
+        return details
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers if self._executor is not None else 0,
+            "pending": self.pending,
+            "parsed": self.parsed,
+            "inline": self.inline,
+            "restarts": self.restarts,
+        }
+
+
+parse_pool = ParsePool(PARSE_WORKERS)
@@ -0,0 +1,58 @@
+"""Micro-benchmark of the product detail parser backends on saved detail pages.
+
+Run from the repository root:
+
+    uv run python -m benchmarks.bench_parsing [--repeat 20]
+
+Every html file in benchmarks/fixtures/details is parsed by each backend in app/parsing.py.
+The results of all backends have to agree before the timings are printed. The `page` row is
+parse_product_page, which scrapes the DOM and fills its gaps from the embedded page state.
+"""
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from app.parsing import PARSERS, parse_product_page
+
+
+FIXTURES = Path(__file__).parent / "fixtures" / "details"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    pages = {path.stem: path.read_text() for path in sorted(FIXTURES.glob("*.html"))}
+    if not pages:
+        raise SystemExit(f"No fixtures in {FIXTURES}")
+
+    for name, html in pages.items():
+        results = {backend: parse(html) for backend, parse in PARSERS.items()}
+        reference = results["bs4"]
+        for backend, result in results.items():
+            if result != reference:
+                raise SystemExit(f"{backend} disagrees with bs4 on {name}:\n{result}\n{reference}")
+        if parse_product_page(html) != reference:
+            raise SystemExit(f"page disagrees with bs4 on {name}:\n{parse_product_page(html)}\n{reference}")
+
+    print(f"{len(pages)} pages, {args.repeat} rounds\n")
+    print(f"{'backend':<8} {'median ms/page':>15} {'min ms/page':>12} {'speedup':>8}")
+
+    medians = {}
+    for backend, parse in {**PARSERS, "page": parse_product_page}.items():
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            for html in pages.values():
+                parse(html)
+            timings.append((time.perf_counter() - start) * 1000 / len(pages))
+        medians[backend] = statistics.median(timings), min(timings)
+
+    for backend, (median, fastest) in medians.items():
+        print(f"{backend:<8} {median:>15.2f} {fastest:>12.2f} {medians['bs4'][0] / median:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
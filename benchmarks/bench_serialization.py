@@ -0,0 +1,78 @@
+"""Response encoding cost of large result sets.
+
+Run from the repository root:
+
+    uv run python -m benchmarks.bench_serialization [--sizes 1000,10000] [--repeat 5]
+
+For every size a list of enriched products is built from the listing fixture, and the response
+encoding of FastAPI (validate again, jsonable_encoder, json.dumps) is compared with
+encode_products.
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.compact import encode_products
+from app.models import Dimensions, Filters, Product
+from app.extractions import _parse_response_data
+
+
+LISTING = Path(__file__).parent / "fixtures" / "listings" / "sofa-couch.json"
+
+
+def build_products(size: int) -> list[Product]:
+    records = _parse_response_data(json.loads(LISTING.read_text()), Filters())
+    products = []
+    for index in range(size):
+        product = records[index % len(records)].to_product()
+        products.append(product.model_copy(update={
+            "product_url": f"{product.product_url}-{index}",
+            "dimensions": Dimensions(width=178, height=73, depth=90),
+            "weight": 45,
+            "color": "Beige",
+            "material": "Chenille",
+            "category": "3-Sitzer Sofas",
+            "delivery_time": "ca. 12. Sept. – 16. Sept.",
+            "description": f"Das Sofa überzeugt mit weichem Chenille-Bezug. Artikel {index}.",
+            "enrichment": "complete",
+        }))
+    return products
+
+
+def measure_time(encode, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encode()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    adapter = TypeAdapter(list[Product])
+
+    def fastapi_encode(products):
+        return json.dumps(jsonable_encoder(adapter.validate_python(products))).encode()
+
+    print(f"{'products':>8} {'fastapi ms':>11} {'encode ms':>10} {'speedup':>8}")
+    for size in (int(size) for size in args.sizes.split(",")):
+        products = build_products(size)
+        assert json.loads(fastapi_encode(products)) == json.loads(encode_products(products))
+        fastapi_ms = measure_time(lambda: fastapi_encode(products), args.repeat)
+        encode_ms = measure_time(lambda: encode_products(products), args.repeat)
+
+        print(f"{size:>8} {fastapi_ms:>11.1f} {encode_ms:>10.1f} {fastapi_ms / encode_ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
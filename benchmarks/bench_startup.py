@@ -0,0 +1,159 @@
+"""Cold start cost of the app: import time, time to first response and RSS.
+
+Run from the repository root:
+
+    uv run --group bench python -m benchmarks.bench_startup [--repeat 5] [--save startup.json]
+
+Every run uses a fresh interpreter. `import main` is timed on its own, and the RSS after the import
+is recorded. uvicorn is then started and timed until `GET /stats` first answers, with the RSS of
+the server and its parse workers at that point. Medians are reported.
+
+The run exits with status 1 when `import main` loads one of LAZY_MODULES, which only the code
+paths that need them may import. It also exits 1 when a timing or the RSS regressed by more than
+`--tolerance` against `--baseline`.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import psutil
+
+
+# Dependencies that must not be loaded by `import main`
+LAZY_MODULES = ("openai", "dotenv", "playwright", "bs4", "requests", "pandas")
+
+IMPORT_PROBE = f"""
+import json, sys, time
+import psutil
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "import_ms": elapsed * 1000,
+    "import_rss_mib": psutil.Process().memory_info().rss / 2 ** 20,
+    "loaded": sorted(name for name in {LAZY_MODULES!r} if name in sys.modules),
+}}))
+"""
+
+
+def tree_rss(process: psutil.Process) -> int:
+    rss = 0
+    for proc in [process, *process.children(recursive=True)]:
+        try:
+            rss += proc.memory_info().rss
+        except psutil.Error:
+            pass
+    return rss
+
+
+def measure_import(env: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE], env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def measure_first_response(env: dict, port: int, timeout: float) -> dict:
+    # Another server on the port would answer in place of the one being measured
+    with socket.socket() as probe:
+        if probe.connect_ex(("127.0.0.1", port)) == 0:
+            raise SystemExit(f"Port {port} is already in use")
+
+    started = time.perf_counter()
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/stats", timeout=1) as response:
+                    if response.status == 200:
+                        break
+            except (urllib.error.URLError, ConnectionError, TimeoutError):
+                pass
+            if app.poll() is not None:
+                raise SystemExit(f"uvicorn exited with status {app.returncode}")
+            time.sleep(0.01)
+        else:
+            raise SystemExit(f"The app did not answer within {timeout} s")
+
+        return {
+            "first_response_ms": (time.perf_counter() - started) * 1000,
+            "server_rss_mib": tree_rss(psutil.Process(app.pid)) / 2 ** 20,
+        }
+    finally:
+        app.terminate()
+        app.wait()
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for key in ("import_ms", "import_rss_mib", "first_response_ms", "server_rss_mib"):
+        if key in baseline and result[key] > baseline[key] * (1 + tolerance):
+            regressions.append(f"{key}: {baseline[key]} -> {result[key]}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--prelaunch", action="store_true", help="launch chromium at startup as well")
+    parser.add_argument("--save", help="write the result as JSON")
+    parser.add_argument("--baseline", help="result JSON of an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = {
+            **os.environ,
+            "OPENROUTER_KEY": os.getenv("OPENROUTER_KEY", "bench"),
+            "BROWSER_PRELAUNCH": "true" if args.prelaunch else "false",
+            "JOBS_IN_APP": "false",
+            "JOBS_PATH": os.path.join(directory, "jobs.sqlite3"),
+        }
+        imports = [measure_import(env) for _ in range(args.repeat)]
+        starts = [measure_first_response(env, args.port, args.timeout) for _ in range(args.repeat)]
+
+    result = {
+        key: round(statistics.median(run[key] for run in runs), 1)
+        for runs in (imports, starts)
+        for key in runs[0]
+        if key != "loaded"
+    }
+    loaded = sorted({name for run in imports for name in run["loaded"]})
+
+    print(f"{'import ms':>10} {'import MiB':>11} {'first response ms':>18} {'server MiB':>11}")
+    print(
+        f"{result['import_ms']:>10} {result['import_rss_mib']:>11} "
+        f"{result['first_response_ms']:>18} {result['server_rss_mib']:>11}"
+    )
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=2)
+
+    failures = [f"import main loaded {', '.join(loaded)}"] if loaded else []
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures += compare(result, json.load(f), args.tolerance)
+    if failures:
+        print("Regressions:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    if args.baseline:
+        print("No regressions against", args.baseline)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+"""Load driver for /get, reports latency percentiles, throughput and peak RSS.
+
+Starts the stand-in server and the app on local ports and runs every concurrency level:
+
+    uv run --group bench python -m benchmarks.load --concurrency 1,4,16 --requests 40 --save results.json
+
+`--baseline results.json` compares against an earlier run and exits with status 1 when p95
+latency or throughput regressed by more than `--tolerance`. `--url` measures an already
+running app instead; peak RSS is then only reported when `--pid` is given.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import aiohttp
+import psutil
+
+
+SENTENCES = [
+    "Show me the list of green sofas, show cheapest ones first",
+    "most popular sofas",
+    "grey sofa under 800 euro",
+    "beige corner sofa wider than 2.5 meters",
+    "Give me sofas named JENNY",
+]
+
+
+def tree_rss(process: psutil.Process) -> int:
+    rss = 0
+    for proc in [process, *process.children(recursive=True)]:
+        try:
+            rss += proc.memory_info().rss
+        except psutil.Error:
+            pass
+    return rss
+
+
+async def sample_rss(process: psutil.Process, peak: list[int], stop: asyncio.Event):
+    while not stop.is_set():
+        peak[0] = max(peak[0], tree_rss(process))
+        await asyncio.sleep(0.05)
+
+
+async def run_level(url: str, concurrency: int, requests: int, unique: bool, process: psutil.Process | None) -> dict:
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker(session: aiohttp.ClientSession):
+        nonlocal errors
+        for i in counter:
+            sentence = SENTENCES[i % len(SENTENCES)]
+            if unique:
+                sentence = f"{sentence} #{concurrency}-{i}"
+            start = time.perf_counter()
+            try:
+                async with session.post(f"{url}/get", json={"sentence": sentence}) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+                        continue
+            except aiohttp.ClientError:
+                errors += 1
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    peak = [0]
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(process, peak, stop)) if process else None
+
+    timeout = aiohttp.ClientTimeout(total=300)
+    async with aiohttp.ClientSession(timeout=timeout) as session:
+        start = time.perf_counter()
+        await asyncio.gather(*[worker(session) for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    stop.set()
+    if sampler:
+        await sampler
+
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99 or [0] * 99
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(quantiles[49], 1),
+        "p95_ms": round(quantiles[94], 1),
+        "p99_ms": round(quantiles[98], 1),
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "peak_rss_mb": round(peak[0] / 2 ** 20, 1) if process else None,
+    }
+
+
+async def wait_ready(url: str, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(url) as response:
+                    if response.status < 500:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise SystemExit(f"{url} did not come up in {timeout} s")
+
+
+def spawn(args) -> tuple[list[subprocess.Popen], str, psutil.Process]:
+    standin_url = f"http://127.0.0.1:{args.standin_port}"
+    env = {
+        **os.environ,
+        "HOME24_BASE_URL": standin_url,
+        "LLM_BASE_URL": f"{standin_url}/api/v1",
+        "OPENROUTER_KEY": "standin",
+    }
+    standin = subprocess.Popen([
+        sys.executable, "-m", "benchmarks.standin", "--port", str(args.standin_port),
+        "--listing-latency", str(args.listing_latency),
+        "--detail-latency", str(args.detail_latency),
+        "--llm-latency", str(args.llm_latency),
+    ])
+    app = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.app_port), "--log-level", "warning"],
+        env=env,
+    )
+    return [app, standin], f"http://127.0.0.1:{args.app_port}", psutil.Process(app.pid)
+
+
+def compare(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    previous = {row["concurrency"]: row for row in baseline}
+    regressions = []
+    for row in results:
+        before = previous.get(row["concurrency"])
+        if before is None:
+            continue
+        if row["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(f"c={row['concurrency']}: p95 {before['p95_ms']} -> {row['p95_ms']} ms")
+        if row["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"c={row['concurrency']}: throughput {before['throughput_rps']} -> {row['throughput_rps']} rps")
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", default="1,4,16", help="comma separated levels")
+    parser.add_argument("--requests", type=int, default=40, help="requests per level")
+    parser.add_argument("--unique", action="store_true", help="make every sentence unique to bypass caches")
+    parser.add_argument("--url", help="measure a running app instead of spawning one")
+    parser.add_argument("--pid", type=int, help="pid of the running app, for RSS with --url")
+    parser.add_argument("--app-port", type=int, default=8000)
+    parser.add_argument("--standin-port", type=int, default=8001)
+    parser.add_argument("--listing-latency", type=float, default=0.3)
+    parser.add_argument("--detail-latency", type=float, default=0.5)
+    parser.add_argument("--llm-latency", type=float, default=0.8)
+    parser.add_argument("--save", help="write the results as JSON")
+    parser.add_argument("--baseline", help="results JSON of an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    processes = []
+    if args.url:
+        url = args.url.rstrip("/")
+        process = psutil.Process(args.pid) if args.pid else None
+    else:
+        processes, url, process = spawn(args)
+
+    try:
+        await wait_ready(f"{url}/stats")
+
+        results = []
+        print(f"{'conc':>5} {'reqs':>5} {'errs':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>7} {'RSS MiB':>8}")
+        for concurrency in map(int, args.concurrency.split(",")):
+            row = await run_level(url, concurrency, args.requests, args.unique, process)
+            results.append(row)
+            print(
+                f"{row['concurrency']:>5} {row['requests']:>5} {row['errors']:>5} {row['p50_ms']:>9} "
+                f"{row['p95_ms']:>9} {row['p99_ms']:>9} {row['throughput_rps']:>7} {row['peak_rss_mb'] or '-':>8}"
+            )
+    finally:
+        for proc in processes:
+            proc.terminate()
+            proc.wait()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("No regressions against", args.baseline)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
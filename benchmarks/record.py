@@ -0,0 +1,67 @@
+"""Record live home24 responses as fixtures for benchmarks/standin.py.
+
+    uv run python -m benchmarks.record --filters '{"sort_by_popularity": true}' \\
+        --filters '{"product_name": "sofa JENNY"}' --limit 10
+
+Every listing is saved to fixtures/listings/<listing_key>.json and the detail page of each
+of its products to fixtures/details/<last url segment>.html.
+"""
+import argparse
+import asyncio
+import json
+from urllib.parse import quote, urlparse
+
+from app.browser import browser_pool
+from app.constants import BASE_URL
+from app.extractions import _parse_response_data, _prepare_request_data
+from app.fetchers import fetch_json, http_fetcher
+from app.models import Filters
+from benchmarks.standin import DETAILS, LISTINGS, detail_name, listing_key
+
+
+async def record(filters: Filters, limit: int):
+    data = _prepare_request_data(filters, limit, 0)
+    url = f"{BASE_URL}/graphql?extensions={quote(data['extensions'])}&variables={quote(data['variables'])}"
+
+    listing = await fetch_json(url)
+    products = _parse_response_data(listing, filters)
+    if products is None:
+        print(f"Unexpected listing for {filters.to_query_params()!r}, skipped")
+        return
+
+    key = listing_key(data["extensions"], data["variables"])
+    (LISTINGS / f"{key}.json").write_text(json.dumps(listing, indent=2, ensure_ascii=False))
+    print(f"listing {key}: {len(products)} products")
+
+    for product in products:
+        async with browser_pool.page() as page:
+            response = await page.goto(product.product_url, wait_until="networkidle")
+            if response.status != 200:
+                print(f"  {response.status} {product.product_url}, skipped")
+                continue
+            html = await page.content()
+
+        name = detail_name(urlparse(product.product_url).path)
+        (DETAILS / f"{name}.html").write_text(html)
+        print(f"  detail {name}: {len(html) // 1024} KiB")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filters", action="append", help="Filters as JSON, repeatable")
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    LISTINGS.mkdir(parents=True, exist_ok=True)
+    DETAILS.mkdir(parents=True, exist_ok=True)
+
+    try:
+        for raw in args.filters or ['{"sort_by_popularity": true}']:
+            await record(Filters.model_validate_json(raw), args.limit)
+    finally:
+        await http_fetcher.close()
+        await browser_pool.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+"""Local stand-in for home24.de and the OpenAI-compatible LLM endpoint.
+
+Replays the fixtures of benchmarks/fixtures, synthetic until recorded with benchmarks.record,
+so the service can be measured offline:
+
+    uv run python -m benchmarks.standin --port 8001
+    HOME24_BASE_URL=http://127.0.0.1:8001 LLM_BASE_URL=http://127.0.0.1:8001/api/v1 \\
+        OPENROUTER_KEY=stub uv run uvicorn main:app
+
+GraphQL listings are looked up by `listing_key` and product pages by their url path. Requests
+without a recording get a deterministic pick among the existing fixtures, so any query works.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+from app.constants import PRODUCT_SEARCH_HASH
+
+
+FIXTURES = Path(__file__).parent / "fixtures"
+LISTINGS = FIXTURES / "listings"
+DETAILS = FIXTURES / "details"
+
+
+def listing_key(extensions: str, variables: str) -> str:
+    """Identify a GraphQL listing request independently of the page it asks for"""
+    extensions = json.loads(extensions)
+    variables = json.loads(variables)
+    identity = {
+        "hash": extensions["persistedQuery"]["sha256Hash"],
+        "urlParams": variables.get("urlParams"),
+        "query": variables.get("query"),
+        "id": variables.get("id"),
+    }
+    return hashlib.sha1(json.dumps(identity, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def detail_name(path: str) -> str:
+    return path.strip("/").split("/")[-1]
+
+
+def extract_articles(data: dict) -> list[dict]:
+    categories = data["data"]["categories"]
+    if isinstance(categories, list):
+        return categories[0]["categoryArticles"]["articles"]
+    return categories["articles"]
+
+
+def wrap_articles(articles: list[dict], is_product_search: bool) -> dict:
+    if is_product_search:
+        return {"data": {"categories": {"articles": articles}}}
+    return {"data": {"categories": [{"categoryArticles": {"articles": articles}}]}}
+
+
+def _pick(items: list, key: str):
+    return items[int(hashlib.sha1(key.encode()).hexdigest(), 16) % len(items)]
+
+
+class StandIn:
+    def __init__(self, listing_latency: float = 0, detail_latency: float = 0, llm_latency: float = 0):
+        self.listing_latency = listing_latency
+        self.detail_latency = detail_latency
+        self.llm_latency = llm_latency
+        self.listings = {path.stem: json.loads(path.read_text()) for path in sorted(LISTINGS.glob("*.json"))}
+        self.details = {path.stem: path.read_text() for path in sorted(DETAILS.glob("*.html"))}
+        self.requests = {"graphql": 0, "detail": 0, "llm": 0}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/graphql", self.graphql)
+        app.router.add_post("/api/v1/chat/completions", self.chat_completions)
+        app.router.add_get("/_standin/stats", self.stats)
+        app.router.add_get("/{path:.*}", self.detail)
+        return app
+
+    async def graphql(self, request: web.Request) -> web.Response:
+        self.requests["graphql"] += 1
+        await asyncio.sleep(self.listing_latency)
+
+        extensions = request.query["extensions"]
+        variables = json.loads(request.query["variables"])
+        key = listing_key(extensions, request.query["variables"])
+        recorded = self.listings.get(key) or _pick(list(self.listings.values()), key)
+
+        articles = extract_articles(recorded)
+        offset = variables.get("offset", 0) % max(len(articles), 1)
+        articles = (articles[offset:] + articles[:offset])[:variables.get("first", 10)]
+
+        is_product_search = json.loads(extensions)["persistedQuery"]["sha256Hash"] == PRODUCT_SEARCH_HASH
+        return web.json_response(wrap_articles(articles, is_product_search))
+
+    async def detail(self, request: web.Request) -> web.Response:
+        self.requests["detail"] += 1
+        await asyncio.sleep(self.detail_latency)
+
+        name = detail_name(request.path)
+        html = self.details.get(name) or _pick(list(self.details.values()), name)
+        return web.Response(text=html, content_type="text/html")
+
+    async def chat_completions(self, request: web.Request) -> web.Response:
+        """Answers like the OpenAI chat API with filters derived from a few keywords"""
+        self.requests["llm"] += 1
+        await asyncio.sleep(self.llm_latency)
+
+        body = await request.json()
+        sentence = body["messages"][-1]["content"].lower()
+
+        filters = {}
+        for color in ("green", "grey", "beige", "white", "black", "blue"):
+            if color in sentence:
+                filters["color"] = color
+        if "cheap" in sentence:
+            filters["prices_low_to_high"] = True
+        if "popular" in sentence:
+            filters["sort_by_popularity"] = True
+
+        return web.json_response({
+            "id": "chatcmpl-standin",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "standin"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": json.dumps(filters), "refusal": None},
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.requests)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--listing-latency", type=float, default=0.3, help="seconds")
+    parser.add_argument("--detail-latency", type=float, default=0.5, help="seconds")
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="seconds")
+    args = parser.parse_args()
+
+    standin = StandIn(args.listing_latency, args.detail_latency, args.llm_latency)
+    print(f"{len(standin.listings)} listings, {len(standin.details)} detail pages")
+    web.run_app(standin.app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == '__main__':
+    main()
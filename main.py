@@ -1,18 +1,67 @@
+import asyncio
+import json
 import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Literal
 
-from fastapi import FastAPI
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from pydantic import BaseModel, Field
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.ai import get_filters_from_sentence
-from app.extractions import Product, get_product_list
+from app.ai import filters_cache, get_filters_from_sentence
+from app.batch import search_batch
+from app.browser import browser_pool
+from app.catalog import catalog
+from app.compact import encode_batch, encode_products
+from app.connectors import SourcesUnavailable
+from app.detail_cache import detail_cache
+from app.extractions import Product, detail_flight, get_product_list, iter_product_list, listing_flight
+from app.constants import BATCH_MAX_SIZE, BROWSER_PRELAUNCH, JOBS_IN_APP, JOBS_POLL_INTERVAL, SERVER_TIMING
+from app.crawler import catalog_crawler
+from app.fetchers import fetch_scheduler, http_fetcher
+from app.job_worker import job_worker
+from app.jobs import job_queue
+from app.http_cache import (
+    CACHE_CONTROL, CachedResult, etag_matches, is_cacheable, make_etag, result_cache, result_key, sentence_key,
+)
+from app.metrics import end_trace, server_timing, start_trace, stats_collector
+from app.models import BatchResult, EnrichmentField, Filters, Job
+from app.pagination import decode_cursor, next_cursor
+from app.prefetch import prefetcher
+from app.rules import rule_parser
+from app.workers import parse_pool
 
 
 logging.basicConfig()
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if BROWSER_PRELAUNCH:
+        await browser_pool.start()
+    await http_fetcher.start()
+    await parse_pool.start()
+    catalog_crawler.start()
+    if JOBS_IN_APP:
+        job_worker.start()
+    yield
+    await job_worker.close()
+    await catalog_crawler.close()
+    await prefetcher.close()
+    await detail_cache.close()
+    await http_fetcher.close()
+    await parse_pool.close()
+    await browser_pool.close()
+    catalog.close()
+    job_queue.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 app.add_middleware(
@@ -21,16 +70,283 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Degraded", "Server-Timing", "ETag"],
 )
 
+stats_collector.register("browser_pool", browser_pool.stats)
+stats_collector.register("filters_cache", filters_cache.stats)
+stats_collector.register("rules_fast_path", rule_parser.stats)
+stats_collector.register("detail_cache", detail_cache.stats)
+stats_collector.register("listing_flight", listing_flight.stats)
+stats_collector.register("detail_flight", detail_flight.stats)
+stats_collector.register("prefetch", prefetcher.stats)
+stats_collector.register("fetch_scheduler", fetch_scheduler.stats)
+stats_collector.register("parse_pool", parse_pool.stats)
+stats_collector.register("result_cache", result_cache.stats)
+stats_collector.register("catalog", catalog.stats)
+stats_collector.register("catalog_crawler", catalog_crawler.stats)
+stats_collector.register("jobs", job_queue.stats)
+stats_collector.register("job_worker", job_worker.stats)
+
+
+@app.middleware("http")
+async def add_server_timing(request: Request, call_next):
+    if not SERVER_TIMING:
+        return await call_next(request)
+
+    token = start_trace()
+    try:
+        response = await call_next(request)
+    finally:
+        timings = end_trace(token)
+    if timings:
+        response.headers["Server-Timing"] = server_timing(timings)
+    return response
+
 
 class Payload(BaseModel):
-    sentence: str
+    sentence: str | None = None
+    cursor: str | None = None
+    """`X-Next-Cursor` of a previous response, replaces sentence, offset and limit"""
+    fields: list[EnrichmentField] | None = None
+    """Detail page fields to fill in, all of them by default, none with an empty list"""
+    deadline_ms: int | None = Field(None, gt=0)
+    """Budget of the whole search from the arrival of the request, products not enriched by then
+    are flagged with enrichment "timeout"."""
+
+
+class BatchPayload(BaseModel):
+    sentences: list[str] = Field(min_length=1, max_length=BATCH_MAX_SIZE)
+    fields: list[EnrichmentField] | None = None
+    """Detail page fields to fill in, all of them by default, none with an empty list"""
+
+
+def _deadline(data: Payload, started: float) -> float | None:
+    """time.monotonic() by which the listing and the detail pages together must be done"""
+    if data.deadline_ms is None:
+        return None
+    return started + data.deadline_ms / 1000
+
+
+async def _resolve_query(data: Payload, offset: int, limit: int) -> tuple[Filters, int, int]:
+    if data.cursor:
+        try:
+            return decode_cursor(data.cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    if data.sentence:
+        return await get_filters_from_sentence(data.sentence), limit, offset
+
+    raise HTTPException(status_code=422, detail="Either sentence or cursor is required")
+
+
+@app.post("/get", response_model=list[Product], responses={304: {"description": "Not Modified"}})
+async def extract_products_from_home24(
+    data: Payload,
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+) -> Response:
+    """Responses carry an ETag, a matching If-None-Match is answered with 304 from the result cache.
+
+    `X-Degraded: true` marks a result missing a source or made of the hardcoded products, 503 means no
+    source answered at all.
+    """
+    started = time.monotonic()
+    # A repeated sentence is answered before the rules or the LLM see it again
+    alias = sentence_key(data.sentence, limit, offset, data.fields) if data.sentence and not data.cursor else None
+    result = result_cache.get(alias) if alias else None
+    cacheable = True
+    degraded = False
+
+    if result is None:
+        filters, limit, offset = await _resolve_query(data, offset, limit)
+        logger.info("query -> %s, offset: %s, limit: %s", filters.to_query_params(), offset, limit)
+        key = result_key(filters, limit, offset, data.fields)
+        result = result_cache.get(key)
+
+        if result is None:
+            try:
+                listing = await get_product_list(
+                    filters, limit=limit, offset=offset, fields=data.fields, deadline=_deadline(data, started)
+                )
+            except SourcesUnavailable as e:
+                raise HTTPException(status_code=503, detail=str(e))
+            products, degraded, cacheable = listing.products, listing.degraded, is_cacheable(listing)
+
+            body = encode_products(products)
+            result = CachedResult(make_etag(key, body), body, next_cursor(filters, limit, offset, len(products)))
+            if cacheable:
+                result_cache.set(key, result)
+            if result.cursor:
+                prefetcher.schedule_next_page(filters, limit, offset + len(products))
+
+        if alias and cacheable:
+            result_cache.set(alias, result)
+
+    # Degraded or partial results are neither kept here nor by the client
+    headers = {"ETag": result.etag, "Cache-Control": CACHE_CONTROL if cacheable else "no-store"}
+    if degraded:
+        headers["X-Degraded"] = "true"
+    if result.cursor:
+        headers["X-Next-Cursor"] = result.cursor
+
+    if etag_matches(request.headers.get("if-none-match"), result.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(result.body, media_type="application/json", headers=headers)
+
+
+@app.post("/get/stream")
+async def stream_products_from_home24(
+    data: Payload,
+    request: Request,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    format: Literal["ndjson", "sse"] | None = None,
+) -> StreamingResponse:
+    """Emit listing rows as soon as they are parsed, then a details patch per product.
+
+    Every message is {"event": "product" | "details" | "end", "index": ..., "data": ...}
+    sent as NDJSON lines, or as Server-Sent Events with `format=sse` / `Accept: text/event-stream`.
+    """
+    started = time.monotonic()
+    filters, limit, offset = await _resolve_query(data, offset, limit)
+    logger.info("stream query -> %s, offset: %s, limit: %s", filters.to_query_params(), offset, limit)
+
+    if format is None:
+        format = "sse" if "text/event-stream" in request.headers.get("accept", "") else "ndjson"
+
+    def encode(event: str, index: int | None, payload) -> str:
+        message = json.dumps({"event": event, "index": index, "data": payload}, ensure_ascii=False)
+        if format == "sse":
+            return f"event: {event}\ndata: {message}\n\n"
+        return message + "\n"
+
+    async def events():
+        received = 0
+        products = iter_product_list(
+            filters, limit=limit, offset=offset, fields=data.fields, deadline=_deadline(data, started)
+        )
+        async for event, index, fields in products:
+            if event == "product":
+                received += 1
+            yield encode(event, index, fields)
+        cursor = next_cursor(filters, limit, offset, received)
+        if cursor:
+            prefetcher.schedule_next_page(filters, limit, offset + received)
+        yield encode("end", None, {"next_cursor": cursor})
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/get/batch", response_model=list[BatchResult])
+async def extract_products_in_batch(
+    data: BatchPayload,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+) -> Response:
+    """One result per sentence in input order, sentences that fail carry an error instead of products"""
+    logger.info("batch of %s sentences, offset: %s, limit: %s", len(data.sentences), offset, limit)
+    results = await search_batch(data.sentences, limit=limit, offset=offset, fields=data.fields)
+    return Response(encode_batch(results), media_type="application/json")
+
+
+@app.post("/jobs", response_model=Job, status_code=202)
+async def submit_job(
+    data: Payload,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+) -> Job:
+    """Queue a search and return its id at once, a worker runs it in the background.
+
+    Poll `GET /jobs/{id}` or follow `GET /jobs/{id}/stream`, products appear as soon as the
+    listing is parsed and fill in while their detail pages are done.
+    """
+    request = {"sentence": data.sentence, "filters": None, "limit": limit, "offset": offset}
+    if data.cursor:
+        filters, request["limit"], request["offset"] = await _resolve_query(data, offset, limit)
+        request["filters"] = filters.model_dump(mode="json", exclude_defaults=True)
+    elif not data.sentence:
+        raise HTTPException(status_code=422, detail="Either sentence or cursor is required")
+    request.update(fields=data.fields, deadline_ms=data.deadline_ms)
+
+    # SQLite may wait on a worker's write lock, the event loop must not
+    job_id = await asyncio.to_thread(job_queue.submit, request)
+    logger.info("job %s queued, offset: %s, limit: %s", job_id, request["offset"], request["limit"])
+    return await asyncio.to_thread(job_queue.get, job_id)
+
+
+@app.get("/jobs/{job_id}", response_model=Job)
+async def get_job(job_id: str) -> Job:
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job
+
+
+@app.get("/jobs/{job_id}/stream")
+async def stream_job(
+    job_id: str,
+    request: Request,
+    format: Literal["ndjson", "sse"] | None = None,
+) -> StreamingResponse:
+    """Emit the job every time a worker updated it, the last message has status done or failed.
+
+    Messages are {"event": "job", "index": null, "data": job} in the format of `/get/stream`.
+    """
+    if await asyncio.to_thread(job_queue.updated_at, job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+
+    if format is None:
+        format = "sse" if "text/event-stream" in request.headers.get("accept", "") else "ndjson"
+
+    def encode(job: Job) -> str:
+        message = json.dumps({"event": "job", "index": None, "data": job.model_dump(mode="json")}, ensure_ascii=False)
+        if format == "sse":
+            return f"event: job\ndata: {message}\n\n"
+        return message + "\n"
+
+    async def events():
+        seen = None
+        while True:
+            updated_at = await asyncio.to_thread(job_queue.updated_at, job_id)
+            if updated_at is None:
+                return
+            if updated_at != seen:
+                seen = updated_at
+                job = await asyncio.to_thread(job_queue.get, job_id)
+                yield encode(job)
+                if job.status in ("done", "failed"):
+                    return
+            await asyncio.sleep(JOBS_POLL_INTERVAL)
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/stats")
+async def get_stats() -> dict:
+    return {
+        "browser_pool": browser_pool.stats(),
+        "filters_cache": filters_cache.stats(),
+        "rules_fast_path": rule_parser.stats(),
+        "detail_cache": detail_cache.stats(),
+        "listing_flight": listing_flight.stats(),
+        "detail_flight": detail_flight.stats(),
+        "prefetch": prefetcher.stats(),
+        "fetch_scheduler": fetch_scheduler.stats(),
+        "parse_pool": parse_pool.stats(),
+        "result_cache": result_cache.stats(),
+        "catalog": await asyncio.to_thread(catalog.stats),
+        "catalog_crawler": catalog_crawler.stats(),
+        "jobs": await asyncio.to_thread(job_queue.stats),
+        "job_worker": job_worker.stats(),
+    }
 
 
-@app.post("/get")
-async def extract_products_from_home24(data: Payload, offset: int=0, limit: int=10) -> list[Product]:
-    filters = get_filters_from_sentence(data.sentence)
-    logger.info("query -> %s", filters.to_query_params())
-    products = await get_product_list(filters)
-    return products
+@app.get("/metrics")
+async def get_metrics() -> Response:
+    # The collectors include the job queue, which reads SQLite
+    return Response(await asyncio.to_thread(generate_latest), media_type=CONTENT_TYPE_LATEST)
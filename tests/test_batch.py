@@ -0,0 +1,93 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+import main
+from app import batch
+from app.batch import search_batch
+from app.constants import BATCH_MAX_SIZE
+from app.connectors import Listing
+from app.models import Filters, Product
+
+
+def product(name: str) -> Product:
+    return Product(name=name, image_url="", price_eur=1, product_url=f"https://example.com/{name}", brand="", rating=0)
+
+
+def use_listings(monkeypatch, listings: dict[str, Listing]) -> list[str]:
+    """Sentences are their own product name, each one is listed from `listings`. Returns the calls made"""
+    calls = []
+
+    async def get_filters_from_sentence(sentence: str) -> Filters:
+        calls.append(f"filters {sentence}")
+        if sentence not in listings:
+            raise ValueError("unknown")
+        return Filters(product_name=sentence)
+
+    async def get_product_listing(filters: Filters, limit: int, offset: int) -> Listing:
+        calls.append(f"listing {filters.product_name}")
+        return listings[filters.product_name]
+
+    async def get_product_details(url: str, fields=None):
+        calls.append(f"details {url.rsplit('/', 1)[1]}")
+        return None
+
+    monkeypatch.setattr(batch, "get_filters_from_sentence", get_filters_from_sentence)
+    monkeypatch.setattr(batch, "get_product_listing", get_product_listing)
+    monkeypatch.setattr(batch, "get_product_details", get_product_details)
+    return calls
+
+
+def test_degraded_is_carried_per_sentence(monkeypatch):
+    use_listings(monkeypatch, {
+        "live": Listing([product("a")], [], False),
+        "fallback": Listing([product("b")], [], True),
+    })
+
+    results = asyncio.run(search_batch(["live", "fallback", "unknown"], fields=[]))
+
+    assert [result.degraded for result in results] == [False, True, False]
+    assert results[2].error is not None
+
+
+def test_shared_work_is_done_once_per_batch(monkeypatch):
+    calls = use_listings(monkeypatch, {
+        "sofa": Listing([product("a"), product("b")], [0, 1]),
+        "couch": Listing([product("b")], [0]),
+    })
+
+    results = asyncio.run(search_batch(["sofa", "couch", "sofa"]))
+
+    assert sorted(calls) == [
+        "details a", "details b", "filters couch", "filters sofa", "listing couch", "listing sofa",
+    ]
+    assert [len(result.products) for result in results] == [2, 1, 2]
+    # Every result has its own products even when sentences share a listing
+    assert results[0].products[0] is not results[2].products[0]
+
+
+def test_batch_runs_at_most_concurrency_tasks(monkeypatch):
+    running, peak = 0, 0
+
+    async def get_filters_from_sentence(sentence: str) -> Filters:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        raise ValueError("unknown")
+
+    monkeypatch.setattr(batch, "get_filters_from_sentence", get_filters_from_sentence)
+    results = asyncio.run(search_batch([f"sofa {index}" for index in range(6)], concurrency=2))
+
+    assert peak == 2
+    assert all(result.error for result in results)
+
+
+def test_batch_size_is_limited():
+    client = TestClient(main.app)
+
+    assert client.post("/get/batch", json={"sentences": []}).status_code == 422
+    too_many = ["sofa"] * (BATCH_MAX_SIZE + 1)
+    assert client.post("/get/batch", json={"sentences": too_many}).status_code == 422
+    assert client.post("/get/batch?limit=101", json={"sentences": ["sofa"]}).status_code == 422
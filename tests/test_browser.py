@@ -0,0 +1,121 @@
+import asyncio
+
+from app.browser import BrowserPool, ResourcePolicy
+
+
+class FakeContext:
+    async def route(self, pattern, handler):
+        pass
+
+    def on(self, event, handler):
+        pass
+
+    async def new_page(self):
+        return object()
+
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.closed = False
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    async def new_context(self, **options):
+        return FakeContext()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeChromium:
+    def __init__(self):
+        self.browsers: list[FakeBrowser] = []
+
+    async def launch(self):
+        self.browsers.append(FakeBrowser())
+        return self.browsers[-1]
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.chromium = FakeChromium()
+
+    async def stop(self):
+        pass
+
+
+def pool(**options) -> tuple[BrowserPool, list[FakeBrowser]]:
+    """A started pool launching fake browsers, the list fills with every browser it launches"""
+    browser_pool = BrowserPool(**options)
+    browser_pool._playwright = FakePlaywright()
+    return browser_pool, browser_pool._playwright.chromium.browsers
+
+
+def test_browser_is_recycled_after_serving_its_pages():
+    async def run():
+        browser_pool, browsers = pool(recycle_after=2)
+        for _ in range(3):
+            async with browser_pool.page():
+                pass
+        return browser_pool, browsers
+
+    browser_pool, browsers = asyncio.run(run())
+    assert len(browsers) == 2
+    assert browsers[0].closed and not browsers[1].closed
+    assert browser_pool.stats()["recycle_count"] == 1
+
+
+def test_crashed_browser_is_relaunched():
+    async def run():
+        browser_pool, browsers = pool()
+        async with browser_pool.page():
+            pass
+        browsers[0].connected = False
+        async with browser_pool.page():
+            pass
+        return browser_pool, browsers
+
+    browser_pool, browsers = asyncio.run(run())
+    assert len(browsers) == 2
+    assert browser_pool.stats()["crash_count"] == 1
+    assert browser_pool.stats()["connected_browsers"] == 1
+
+
+def test_retired_browser_is_closed_once_its_last_page_is_released():
+    async def run():
+        browser_pool, browsers = pool(recycle_after=1, max_pages=2)
+        async with browser_pool.page():
+            async with browser_pool.page():
+                # The second page recycled the browser the first one still uses
+                assert len(browsers) == 2 and not browsers[0].closed
+            assert not browsers[0].closed
+        assert browsers[0].closed and not browsers[1].closed
+        return browser_pool
+
+    browser_pool = asyncio.run(run())
+    assert browser_pool.stats()["in_use"] == 0
+
+
+def test_resource_policy_blocks_resource_types_and_tracker_hosts():
+    policy = ResourcePolicy(resource_types=("image", "font"), hosts=("google-analytics.com", "criteo.net"))
+
+    assert policy.should_block("image", "https://www.home24.de/a.jpg")
+    assert policy.should_block("script", "https://google-analytics.com/analytics.js")
+    assert policy.should_block("xhr", "https://static.criteo.net:443/js/ld.js")
+    assert not policy.should_block("script", "https://www.home24.de/app.js")
+    assert not policy.should_block("document", "https://www.home24.de/produkt/sofa")
+
+
+def test_resource_policy_matches_whole_host_labels_only():
+    policy = ResourcePolicy(hosts=("criteo.net",))
+
+    assert not policy.should_block("script", "https://notcriteo.net/a.js")
+    assert not policy.should_block("script", "https://criteo.net.example.com/a.js")
+    assert not policy.should_block("script", "https://example.com/criteo.net/a.js")
+    assert not policy.should_block("script", "data:text/javascript,criteo.net")
+    assert not ResourcePolicy().enabled
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from app.cache import SqliteStore, TTLCache
+
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache(ttl=0.02)
+    cache.set("key", 1)
+    assert cache.get("key") == 1
+    time.sleep(0.03)
+    assert cache.get("key") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+
+
+def test_store_survives_a_new_cache(tmp_path):
+    store = SqliteStore(str(tmp_path / "cache.sqlite3"))
+    TTLCache(store=store).set("key", {"value": 1})
+
+    cache = TTLCache(store=store)
+    assert cache.get("key") == {"value": 1}
+    assert cache.get("key") == {"value": 1}
+    assert (cache.stats()["store_hits"], cache.stats()["hits"]) == (1, 1)
+    store.close()
+
+
+def test_async_access_goes_through_the_store(tmp_path):
+    store = SqliteStore(str(tmp_path / "cache.sqlite3"))
+    asyncio.run(TTLCache(store=store).aset("key", {"value": 1}))
+
+    cache = TTLCache(store=store)
+    assert asyncio.run(cache.aget("key")) == {"value": 1}
+    assert asyncio.run(cache.aget("missing")) is None
+    assert (cache.stats()["store_hits"], cache.stats()["misses"]) == (1, 1)
+    store.close()
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from app import crawler as crawler_module
+from app.catalog import ProductCatalog
+from app.crawler import CatalogCrawler
+from app.models import Dimensions, Filters, Product
+
+
+def product(index: int) -> Product:
+    return Product(
+        name=f"Sofa {index}", image_url="", price_eur=100 + index, product_url=f"https://example.com/{index}",
+        brand="b", rating=4, dimensions=Dimensions(width=150 + index, height=80, depth=90), color="Grau",
+    )
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    catalog = ProductCatalog(str(tmp_path / "catalog.sqlite3"), enabled=True)
+    yield catalog
+    catalog.close()
+
+
+def crawl(monkeypatch, catalog: ProductCatalog, size: int, max_products: int) -> CatalogCrawler:
+    listing = [product(index) for index in range(size)]
+
+    async def fetch_product_listing(filters, limit, offset):
+        return listing[offset:offset + limit], True
+
+    async def set_extra_data(product):
+        pass
+
+    monkeypatch.setattr(crawler_module, "fetch_product_listing", fetch_product_listing)
+    monkeypatch.setattr(crawler_module, "set_extra_data", set_extra_data)
+    crawler = CatalogCrawler(catalog, page_size=4, max_products=max_products)
+    asyncio.run(crawler.crawl_category("sofa-couch"))
+    return crawler
+
+
+def test_complete_crawl_answers_searches(monkeypatch, catalog):
+    crawl(monkeypatch, catalog, size=10, max_products=100)
+
+    assert catalog.is_fresh("sofa-couch")
+    assert [p.name for p in catalog.search(Filters(width_min=155), limit=3)] == ["Sofa 5", "Sofa 6", "Sofa 7"]
+    assert [p.price_eur for p in catalog.search(Filters(prices_high_to_low=True), limit=2)] == [109, 108]
+
+
+def test_capped_crawl_leaves_the_category_to_live_search(monkeypatch, catalog):
+    crawl(monkeypatch, catalog, size=10, max_products=100)
+    crawler = crawl(monkeypatch, catalog, size=20, max_products=8)
+
+    assert crawler.capped == 1
+    assert not catalog.is_fresh("sofa-couch")
+    assert catalog.search(Filters()) is None
+
+
+def test_unsupported_filters_defer_to_live_search(monkeypatch, catalog):
+    crawl(monkeypatch, catalog, size=10, max_products=100)
+    assert catalog.search(Filters(product_name="jenny")) is None
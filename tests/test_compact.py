@@ -0,0 +1,30 @@
+import json
+
+from app.compact import ProductRecord, encode_products, products_to_rows
+from app.models import Dimensions, Product
+
+
+def product(**fields) -> Product:
+    return Product(name="Sofa", image_url="i", price_eur=199.9, product_url="u", brand="b", rating=4.5, **fields)
+
+
+def test_record_round_trip_keeps_every_field():
+    original = product(dimensions=Dimensions(width=178, height=73, depth=90), weight=45, color="Beige",
+                       description="Weich", enrichment="complete")
+    assert ProductRecord.from_product(original).to_product() == original
+
+
+def test_record_without_all_dimensions_has_none():
+    record = ProductRecord.from_product(product())
+    record.width = 100
+    assert record.to_product().dimensions is None
+
+
+def test_encode_products_matches_model_dump():
+    products = [product(), product(color="Grau")]
+    assert json.loads(encode_products(products)) == [p.model_dump(mode="json") for p in products]
+
+
+def test_rows_are_flat():
+    rows = products_to_rows([product(dimensions=Dimensions(width=1, height=2, depth=3))])
+    assert (rows[0]["width"], rows[0]["height"], rows[0]["depth"]) == (1, 2, 3)
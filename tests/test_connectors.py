@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+import pytest
+
+from app.connectors import Connector, SourcesUnavailable, search_connectors
+from app.models import Filters, Product
+
+
+def product(name: str, price: float) -> Product:
+    return Product(name=name, image_url="", price_eur=price, product_url=f"https://example.com/{name}", brand="", rating=0)
+
+
+class FakeConnector(Connector):
+    def __init__(self, name: str, source: str, result=None, error: Exception | None = None, delay: float = 0,
+                 deadline: float | None = None, fallback: bool = False):
+        self.name = name
+        self.source = source
+        self.result = result
+        self.error = error
+        self.delay = delay
+        self.deadline = deadline
+        self.fallback = fallback
+        self.calls = 0
+
+    def can_serve(self, filters: Filters) -> bool:
+        return True
+
+    async def search(self, filters: Filters, limit: int, offset: int):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def search(connectors: list[Connector], filters: Filters | None = None):
+    return asyncio.run(search_connectors(connectors, filters or Filters(), 10, 0))
+
+
+def test_sources_are_searched_concurrently_and_merged_in_price_order():
+    a = FakeConnector("a", "shop_a", ([product("a1", 30), product("a2", 10)], True), delay=0.05)
+    b = FakeConnector("b", "shop_b", ([product("b1", 20)], False), delay=0.05)
+
+    started = time.monotonic()
+    listing = search([a, b], Filters(prices_low_to_high=True))
+    elapsed = time.monotonic() - started
+
+    assert [p.name for p in listing.products] == ["a2", "b1", "a1"]
+    assert listing.pending == [0, 2]
+    assert not listing.degraded
+    assert elapsed < 0.09
+
+
+def test_alternatives_of_a_source_are_tried_in_order():
+    catalog = FakeConnector("catalog", "shop", None)
+    live = FakeConnector("live", "shop", ([product("p", 1)], True))
+    fallback = FakeConnector("fallback", "shop", ([product("f", 1)], False), fallback=True)
+
+    listing = search([catalog, live, fallback])
+
+    assert [p.name for p in listing.products] == ["p"]
+    assert (catalog.calls, live.calls, fallback.calls) == (1, 1, 0)
+    assert not listing.degraded
+
+
+def test_fallback_answer_degrades_the_listing():
+    live = FakeConnector("live", "shop", error=RuntimeError("down"))
+    fallback = FakeConnector("fallback", "shop", ([product("f", 1)], False), fallback=True)
+
+    listing = search([live, fallback])
+
+    assert [p.name for p in listing.products] == ["f"]
+    assert listing.degraded
+
+
+def test_missing_source_degrades_the_listing():
+    slow = FakeConnector("slow", "shop_a", ([product("a", 1)], False), delay=1, deadline=0.01)
+    ok = FakeConnector("ok", "shop_b", ([product("b", 1)], False))
+
+    listing = search([slow, ok])
+
+    assert [p.name for p in listing.products] == ["b"]
+    assert listing.degraded
+
+
+def test_no_answering_source_raises():
+    with pytest.raises(SourcesUnavailable):
+        search([FakeConnector("live", "shop", error=RuntimeError("down"))])
+
+
+def test_no_serving_source_is_an_empty_listing():
+    assert search([]) == ([], [], False)
+
+
+def test_hardcoded_fallback_is_counted_with_the_reason():
+    from prometheus_client import REGISTRY
+
+    from app.extractions import hardcoded_connector
+
+    def count(reason: str) -> float:
+        return REGISTRY.get_sample_value("product_agent_hardcoded_fallbacks_total", {"reason": reason}) or 0
+
+    before = count("timeout"), count("deferred")
+    search([FakeConnector("slow", "home24", delay=1, deadline=0.01), hardcoded_connector])
+    search([FakeConnector("blocked", "home24", None), hardcoded_connector])
+    assert (count("timeout"), count("deferred")) == (before[0] + 1, before[1] + 1)
+
+
+def test_hardcoded_fallback_respects_limit_and_offset():
+    from app.extractions import hardcoded_connector
+
+    first, _ = asyncio.run(hardcoded_connector.search(Filters(), 3, 0))
+    rest, _ = asyncio.run(hardcoded_connector.search(Filters(), 3, 3))
+    assert len(first) == 3 and len(rest) == 2
+    assert {p.product_url for p in first}.isdisjoint(p.product_url for p in rest)
@@ -0,0 +1,38 @@
+import asyncio
+
+from app.detail_cache import ProductDetailCache
+
+
+DETAILS = {"dimensions": {"width": 1, "height": 2, "depth": 3}, "color": "Grau", "delivery_time": "2 Tage"}
+
+
+def test_only_the_tiers_of_the_requested_fields_are_needed():
+    async def run():
+        cache = ProductDetailCache()
+        await cache.set("u", DETAILS)
+        cache.volatile.delete("u")
+        return await cache.get("u", ["color"]), await cache.get("u")
+
+    (details, stale), missing = asyncio.run(run())
+    assert details["color"] == "Grau" and not stale
+    assert missing is None
+
+
+def test_entries_past_refresh_are_served_stale():
+    async def run():
+        cache = ProductDetailCache(volatile_refresh=0)
+        await cache.set("u", DETAILS)
+        return await cache.get("u", ["delivery_time"])
+
+    details, stale = asyncio.run(run())
+    assert details == {"delivery_time": "2 Tage"} and stale
+
+
+def test_details_persist_in_sqlite(tmp_path):
+    path = str(tmp_path / "details.sqlite3")
+    asyncio.run(ProductDetailCache(path=path).set("u", DETAILS))
+
+    cache = ProductDetailCache(path=path)
+    details, _ = asyncio.run(cache.get("u"))
+    assert details["dimensions"] == DETAILS["dimensions"] and details["delivery_time"] == "2 Tage"
+    assert cache.stats()["stable"]["store_hits"] == 1
@@ -0,0 +1,151 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+from app import extractions
+from app.connectors import Connector
+from app.extractions import get_product_list, hardcoded_connector, iter_product_list
+from app.models import Filters, Product
+
+
+DETAILS = {
+    "dimensions": {"width": 178, "height": 73, "depth": 90}, "weight": 45, "color": "Beige", "material": "Chenille",
+    "category": "Sofas", "delivery_time": "ca. 5 Tage", "description": "Weich",
+}
+
+
+def product(name: str) -> Product:
+    return Product(name=name, image_url="", price_eur=1, product_url=f"https://example.com/{name}", brand="", rating=0)
+
+
+class ListingConnector(Connector):
+    name = "live"
+    source = "home24"
+
+    def __init__(self, names: list[str], delay: float = 0, deadline: float | None = None):
+        self.names = names
+        self.delay = delay
+        self.deadline = deadline
+
+    def can_serve(self, filters: Filters) -> bool:
+        return True
+
+    async def search(self, filters: Filters, limit: int, offset: int):
+        await asyncio.sleep(self.delay)
+        return [product(name) for name in self.names], True
+
+
+@pytest.fixture
+def detail_pages(monkeypatch):
+    """Detail pages by product name: seconds until each one is done, missing names are never asked for"""
+    delays: dict[str, float] = {}
+    requested: list[str] = []
+
+    async def get_product_details(url: str, fields=None):
+        name = url.rsplit("/", 1)[1]
+        requested.append(name)
+        await asyncio.sleep(delays[name])
+        return DETAILS
+
+    monkeypatch.setattr(extractions, "get_product_details", get_product_details)
+    return delays, requested
+
+
+def use_connectors(monkeypatch, *connectors: Connector):
+    monkeypatch.setattr(extractions, "CONNECTORS", list(connectors))
+
+
+def test_empty_fields_skip_the_detail_pages(monkeypatch, detail_pages):
+    _, requested = detail_pages
+    use_connectors(monkeypatch, ListingConnector(["a", "b"]))
+
+    listing = asyncio.run(get_product_list(Filters(), fields=[]))
+
+    assert [p.enrichment for p in listing.products] == ["skipped", "skipped"]
+    assert requested == []
+
+
+def test_products_missing_the_deadline_are_flagged(monkeypatch, detail_pages):
+    delays, _ = detail_pages
+    delays.update(fast=0, slow=1)
+    use_connectors(monkeypatch, ListingConnector(["fast", "slow"]))
+
+    started = time.monotonic()
+    listing = asyncio.run(get_product_list(Filters(), deadline=started + 0.1))
+
+    assert time.monotonic() - started < 0.5
+    fast, slow = listing.products
+    assert (fast.enrichment, fast.color, fast.dimensions.width) == ("complete", "Beige", 178)
+    assert (slow.enrichment, slow.color) == ("timeout", None)
+
+
+def test_deadline_covers_the_listing(monkeypatch, detail_pages):
+    use_connectors(monkeypatch, ListingConnector(["late"], delay=1, deadline=30), hardcoded_connector)
+
+    started = time.monotonic()
+    listing = asyncio.run(get_product_list(Filters(), limit=2, deadline=started + 0.05))
+
+    assert time.monotonic() - started < 0.5
+    assert listing.degraded
+    assert len(listing.products) == 2 and listing.pending == []
+
+
+def test_stream_sends_rows_first_then_requested_fields(monkeypatch, detail_pages):
+    delays, _ = detail_pages
+    delays.update(a=0.02, b=0)
+    use_connectors(monkeypatch, ListingConnector(["a", "b"]))
+
+    async def collect():
+        return [event async for event in iter_product_list(Filters(), fields=["color"])]
+
+    events = asyncio.run(collect())
+
+    assert [(event, index) for event, index, _ in events] == [("product", 0), ("product", 1), ("details", 1), ("details", 0)]
+    assert events[0][2]["name"] == "a"
+    assert events[2][2] == {"color": "Beige", "enrichment": "complete"}
+
+
+FIXTURES = Path(__file__).parent.parent / "benchmarks" / "fixtures" / "details"
+DESCRIPTION_ONLY = """<html><head><title>Sofa</title><script type="application/ld+json">
+{"@type": "Product", "name": "Sofa", "description": "Nur eine Beschreibung"}
+</script></head><body></body></html>"""
+
+
+def use_detail_pages(monkeypatch, pages: dict[str, str]) -> list[str]:
+    loaded = []
+
+    def loader(source: str):
+        async def load(url: str) -> str:
+            loaded.append(source)
+            return pages[source]
+        return load
+
+    monkeypatch.setattr(extractions, "DETAIL_FETCHERS", list(pages))
+    monkeypatch.setattr(extractions, "DETAIL_LOADERS", {source: loader(source) for source in pages})
+    return loaded
+
+
+def test_incomplete_raw_page_goes_on_to_the_browser_and_merges(monkeypatch):
+    loaded = use_detail_pages(monkeypatch, {
+        "http": DESCRIPTION_ONLY, "browser": (FIXTURES / "sofa-jenny.html").read_text(),
+    })
+
+    details = asyncio.run(extractions._load_product_details("https://www.home24.de/produkt/a"))
+
+    assert loaded == ["http", "browser"]
+    assert details["description"] == "Nur eine Beschreibung"
+    assert details["dimensions"] == {"width": 178, "height": 73, "depth": 90}
+    assert details["delivery_time"] is not None
+
+
+def test_complete_raw_page_skips_the_browser(monkeypatch):
+    loaded = use_detail_pages(monkeypatch, {
+        "http": (FIXTURES / "sofa-jenny.html").read_text(), "browser": DESCRIPTION_ONLY,
+    })
+
+    details = asyncio.run(extractions._load_product_details("https://www.home24.de/produkt/b"))
+
+    assert loaded == ["http"]
+    assert details["dimensions"]["width"] == 178
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from app import fetchers
+from app.extractions import DETAIL_MARKERS
+from app.fetchers import (
+    BlockPage, FetchBlocked, Fetcher, ServerError, UpstreamError, check_status, fetch_json, is_blocked,
+)
+from app.scheduler import FetchScheduler
+
+
+PRODUCT_PAGE = (
+    '<html><head><title>Sofa JENNY | home24</title>'
+    '<script src="https://www.google.com/recaptcha/api.js"></script></head>'
+    '<body><div data-section-name="product_dimensions"></div></body></html>'
+)
+
+
+def test_captcha_script_on_a_product_page_is_not_a_block():
+    assert not is_blocked(PRODUCT_PAGE)
+    assert not is_blocked(PRODUCT_PAGE, DETAIL_MARKERS)
+    check_status(200, PRODUCT_PAGE, DETAIL_MARKERS)
+
+
+def test_challenge_page_is_judged_by_its_title():
+    page = "<html><head><title>Access Denied</title></head><body>Reference #18</body></html>"
+
+    assert is_blocked(page)
+    with pytest.raises(BlockPage):
+        check_status(403, page, DETAIL_MARKERS)
+
+
+def test_short_untitled_error_body_is_a_block():
+    assert is_blocked('{"error": "Blocked access"}')
+    assert not is_blocked('{"data": "' + "x" * 4096 + ' captcha"}')
+
+
+def test_status_errors():
+    with pytest.raises(FetchBlocked) as error:
+        check_status(429, "")
+    assert not isinstance(error.value, BlockPage)
+
+    with pytest.raises(ServerError) as error:
+        check_status(503, "")
+    assert error.value.status == 503
+
+    check_status(404, "")
+
+
+class FakeFetcher(Fetcher):
+    def __init__(self, name: str, errors: list[Exception]):
+        self.name = name
+        self.errors = errors
+        self.calls = 0
+
+    async def get_json(self, url: str) -> dict:
+        self.calls += 1
+        if self.calls <= len(self.errors):
+            raise self.errors[self.calls - 1]
+        return {"backend": self.name}
+
+
+def fetch(monkeypatch, http: FakeFetcher, browser: FakeFetcher) -> dict:
+    monkeypatch.setattr(fetchers, "FETCHERS", {"http": http, "browser": browser})
+    monkeypatch.setattr(fetchers, "fetch_scheduler", FetchScheduler(
+        host_rate=1000, retries=2, backoff=0, retry_on=(ServerError,), block_on=(FetchBlocked,),
+    ))
+    return asyncio.run(fetch_json("https://www.home24.de/graphql", ["http", "browser"]))
+
+
+@pytest.mark.parametrize("error", [FetchBlocked("status: 429"), UpstreamError(404)])
+def test_blocks_and_unexpected_statuses_fall_back_without_retries(monkeypatch, error):
+    http, browser = FakeFetcher("http", [error]), FakeFetcher("browser", [])
+
+    assert fetch(monkeypatch, http, browser) == {"backend": "browser"}
+    assert (http.calls, browser.calls) == (1, 1)
+
+
+def test_server_errors_are_retried_before_falling_back(monkeypatch):
+    http, browser = FakeFetcher("http", [ServerError(503)]), FakeFetcher("browser", [])
+
+    assert fetch(monkeypatch, http, browser) == {"backend": "http"}
+    assert (http.calls, browser.calls) == (2, 0)
+
+
+def test_all_backends_failing_is_a_block(monkeypatch):
+    http, browser = FakeFetcher("http", [UpstreamError(400)]), FakeFetcher("browser", [UpstreamError(400)])
+
+    with pytest.raises(FetchBlocked):
+        fetch(monkeypatch, http, browser)
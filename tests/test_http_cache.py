@@ -0,0 +1,57 @@
+from app.connectors import Listing
+from app.http_cache import CACHE_CONTROL, etag_matches, is_cacheable, make_etag, result_key, sentence_key
+from app.models import Filters, Product
+
+
+def product(enrichment: str | None = "complete") -> Product:
+    return Product(name="p", image_url="", price_eur=1, product_url="", brand="", rating=0, enrichment=enrichment)
+
+
+def test_result_key_ignores_the_order_and_repeats_of_fields():
+    filters = Filters(price_max=500)
+    assert result_key(filters, 10, 0, ["weight", "color"]) == result_key(filters, 10, 0, ["color", "weight", "color"])
+    assert result_key(filters, 10, 0, None) != result_key(filters, 10, 0, [])
+
+
+def test_result_key_tells_category_floors_and_paging_apart():
+    keys = {
+        result_key(Filters(), 10, 0, None),
+        result_key(Filters(category="innenleuchte"), 10, 0, None),
+        result_key(Filters(is_floors_search=True), 10, 0, None),
+        result_key(Filters(), 20, 0, None),
+        result_key(Filters(), 10, 10, None),
+    }
+    assert len(keys) == 5
+
+
+def test_sentence_key_normalizes_whitespace_and_case():
+    assert sentence_key(" Sofas  under 500", 10, 0, None) == sentence_key("sofas under 500", 10, 0, None)
+    assert sentence_key("sofas", 10, 0, ["color", "weight"]) == sentence_key("sofas", 10, 0, ["weight", "color"])
+
+
+def test_etag_depends_on_key_and_body():
+    etag = make_etag("key", b"[]")
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == make_etag("key", b"[]")
+    assert etag != make_etag("other", b"[]")
+    assert etag != make_etag("key", b"[{}]")
+
+
+def test_etag_matches_uses_the_weak_comparison():
+    etag = make_etag("key", b"[]")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
+    assert not etag_matches(None, etag)
+
+
+def test_degraded_and_cut_short_results_are_not_cacheable():
+    assert is_cacheable(Listing([product(), product(None)], []))
+    assert not is_cacheable(Listing([product()], [], degraded=True))
+    assert not is_cacheable(Listing([product("timeout")], []))
+    assert not is_cacheable(Listing([product("failed")], []))
+
+
+def test_responses_are_not_stored_by_shared_caches():
+    assert CACHE_CONTROL.startswith("private")
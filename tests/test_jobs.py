@@ -0,0 +1,41 @@
+import time
+
+from app.jobs import JobQueue
+
+
+def test_stats_do_not_create_the_database(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    assert queue.stats()["queued"] == 0
+    assert not (tmp_path / "jobs.sqlite3").exists()
+
+
+def test_job_lifecycle(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"))
+    job_id = queue.submit({"sentence": "sofas"})
+    assert queue.get(job_id).status == "queued"
+
+    assert queue.claim("w1") == (job_id, {"sentence": "sofas"})
+    assert queue.claim("w2") is None
+    assert queue.progress(job_id, "w1", [])
+    assert not queue.progress(job_id, "w2", [])
+
+    assert queue.complete(job_id, "w1", [], "cursor")
+    job = queue.get(job_id)
+    assert (job.status, job.next_cursor, job.attempts) == ("done", "cursor", 1)
+    assert queue.stats()["done"] == 1
+    queue.close()
+
+
+def test_expired_lease_is_taken_over_and_fails_after_max_attempts(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), lease=0.01, max_attempts=2)
+    job_id = queue.submit({"sentence": "sofas"})
+
+    assert queue.claim("w1")[0] == job_id
+    time.sleep(0.02)
+    assert queue.claim("w2")[0] == job_id
+    assert not queue.complete(job_id, "w1", [], None)
+
+    time.sleep(0.02)
+    assert queue.claim("w3") is None
+    assert queue.get(job_id).status == "failed"
+    queue.close()
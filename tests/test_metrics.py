@@ -0,0 +1,47 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.metrics import end_trace, server_timing, stage, start_trace, timed
+from app.workers import ParsePool
+
+
+DETAILS = Path(__file__).parent.parent / "benchmarks" / "fixtures" / "details"
+
+
+def test_stages_of_a_trace_end_up_in_server_timing():
+    @timed("work")
+    def work():
+        pass
+
+    token = start_trace()
+    work()
+    work()
+    with stage("other"):
+        pass
+    timings = end_trace(token)
+
+    assert [name for name, _ in timings] == ["work", "work", "other"]
+    header = server_timing([("work", 0.001), ("work", 0.002), ("other", 0.0005)])
+    assert header == 'work;dur=3.0;desc="2x", other;dur=0.5'
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_parses_are_timed_in_the_parent(workers):
+    html = (DETAILS / "sofa-jenny.html").read_text()
+
+    async def parse():
+        pool = ParsePool(workers)
+        await pool.start()
+        token = start_trace()
+        try:
+            details = await pool.parse(html)
+        finally:
+            timings = end_trace(token)
+            await pool.close()
+        return details, timings
+
+    details, timings = asyncio.run(parse())
+    assert details.width == 178
+    assert [name for name, _ in timings] == ["detail_parse"]
@@ -0,0 +1,28 @@
+import json
+
+from app.categories import category_resolver
+from app.models import Filters
+
+
+def test_category_enum_follows_a_reloaded_table(tmp_path, monkeypatch):
+    for attribute in ("path", "_ids", "_synonyms", "_max_words", "_mtime"):
+        monkeypatch.setattr(category_resolver, attribute, getattr(category_resolver, attribute))
+
+    table = tmp_path / "categories.json"
+    table.write_text(json.dumps({"betten": {"id": "123", "synonyms": ["bed", "beds"]}}))
+    category_resolver.path = str(table)
+    category_resolver.reload()
+
+    assert "betten" in Filters.model_json_schema()["properties"]["category"]["enum"]
+    assert Filters(category="Beds").category == "betten"
+
+
+def test_unknown_category_falls_back_to_none():
+    assert Filters(category="spaceships").category is None
+
+
+def test_query_params():
+    filters = Filters(width_max=250, price_min=100, material="textile", average_rating=4, prices_low_to_high=True)
+    assert filters.to_query_params() == (
+        "width.max=250&price.min=100&material=textile&averageRating=★★★★+und+mehr&order=price_asc&"
+    )
@@ -0,0 +1,38 @@
+import base64
+import json
+
+import pytest
+
+from app.models import Filters
+from app.pagination import decode_cursor, encode_cursor, next_cursor
+
+
+def raw_cursor(payload: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    filters = Filters(price_max=500, category="innenleuchte", prices_low_to_high=True)
+    assert decode_cursor(encode_cursor(filters, 20, 40)) == (filters, 20, 40)
+
+
+def test_next_cursor_points_past_the_received_products():
+    filters = Filters(price_min=100)
+    assert decode_cursor(next_cursor(filters, 10, 20, 10)) == (filters, 10, 30)
+
+
+def test_short_page_has_no_next_cursor():
+    assert next_cursor(Filters(), 10, 0, 9) is None
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64 !",
+    raw_cursor({"filters": {}, "limit": 10}),
+    raw_cursor({"filters": {"price_max": "cheap"}, "limit": 10, "offset": 0}),
+    raw_cursor({"filters": {}, "limit": 0, "offset": 0}),
+    raw_cursor({"filters": {}, "limit": 101, "offset": 0}),
+    raw_cursor({"filters": {}, "limit": 10, "offset": -10}),
+])
+def test_invalid_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(cursor)
@@ -0,0 +1,81 @@
+import json
+from pathlib import Path
+
+from app.parsing import extract_structured_details, parse_product_page
+
+
+FIXTURES = Path(__file__).parent.parent / "benchmarks" / "fixtures" / "details"
+
+
+def page(*documents, body: str = "") -> str:
+    scripts = "".join(f'<script type="application/ld+json">{json.dumps(document)}</script>' for document in documents)
+    return f"<html><head>{scripts}</head><body>{body}</body></html>"
+
+
+def test_dom_values_win_over_json_ld():
+    details = parse_product_page((FIXTURES / "sofa-jenny-jsonld.html").read_text())
+
+    assert (details.width, details.height, details.depth, details.weight) == (178, 73, 90, 45)
+    assert details.description == "Das Sofa JENNY überzeugt mit weichem Chenille-Bezug."
+
+
+def test_json_ld_fills_what_the_dom_lacks():
+    html = page({
+        "@context": "https://schema.org",
+        "@type": "Product",
+        "image": {"@type": "ImageObject", "width": 1200, "height": 800},
+        "width": {"@type": "QuantitativeValue", "value": 1780, "unitCode": "MMT"},
+        "depth": {"@type": "QuantitativeValue", "value": 0.9, "unitCode": "MTR"},
+        "weight": {"@type": "QuantitativeValue", "value": 45000, "unitCode": "GRM"},
+        "color": "Beige",
+    })
+
+    details = parse_product_page(html)
+
+    assert (details.width, details.height, details.depth, details.weight) == (178, None, 90, 45)
+    assert details.color == "Beige"
+
+
+def test_nested_nodes_are_never_read_as_the_product():
+    html = page({
+        "@context": "https://schema.org",
+        "@type": "Product",
+        "image": [{"@type": "ImageObject", "width": 1200, "height": 800, "description": "Frontansicht"}],
+        "brand": {"@type": "Brand", "description": "Möbel online kaufen"},
+        "offers": {"@type": "Offer", "seller": {"@type": "Organization", "description": "Shop"}},
+    })
+
+    assert extract_structured_details(html) is None
+
+
+def test_only_products_are_read_from_json_ld():
+    html = page({"@type": "ImageObject", "width": 1200, "height": 800, "description": "Bild"})
+
+    assert extract_structured_details(html) is None
+
+
+def test_graph_and_additional_property():
+    html = page({"@graph": [
+        {"@type": "BreadcrumbList", "description": "Sofas"},
+        {"@type": ["Product"], "additionalProperty": [
+            {"@type": "PropertyValue", "name": "Breite", "value": "178 cm"},
+            {"@type": "PropertyValue", "name": "Gewicht", "value": 45, "unitCode": "KGM"},
+        ]},
+    ]})
+
+    details = extract_structured_details(html)
+
+    assert (details.width, details.weight) == (178, 45)
+
+
+def test_unknown_units_are_dropped():
+    html = page({"@type": "Product", "width": {"value": 3, "unitCode": "FOT"}, "height": {"value": 73, "unitCode": "KGM"}})
+
+    assert extract_structured_details(html) is None
+
+
+def test_next_data_state():
+    details = parse_product_page((FIXTURES / "sofa-3031952.html").read_text())
+
+    assert (details.width, details.height, details.depth, details.weight) == (138, 80, 77, 18)
+    assert details.category == "2-Sitzer Sofas"
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+
+from app import prefetch
+from app.models import Filters
+from app.prefetch import Prefetcher
+from app.scheduler import BACKGROUND, fetch_priority
+
+
+class FakePool:
+    waiting = 0
+
+
+@pytest.fixture
+def pages(monkeypatch):
+    """Offsets get_product_list was called with and the fetch priority of each call, negative offsets fail"""
+    calls = []
+
+    async def get_product_list(filters: Filters, limit: int, offset: int):
+        calls.append((offset, fetch_priority.get()))
+        await asyncio.sleep(0)
+        if offset < 0:
+            raise RuntimeError("down")
+
+    monkeypatch.setattr(prefetch, "get_product_list", get_product_list)
+    monkeypatch.setattr(prefetch, "browser_pool", FakePool())
+    return calls
+
+
+def test_next_page_is_fetched_once_in_the_background(pages):
+    async def run():
+        prefetcher = Prefetcher(enabled=True)
+        prefetcher.schedule_next_page(Filters(), 10, 10)
+        prefetcher.schedule_next_page(Filters(), 10, 10)
+        await asyncio.sleep(0.01)
+        return prefetcher.stats()
+
+    stats = asyncio.run(run())
+    assert pages == [(10, BACKGROUND)]
+    assert (stats["scheduled"], stats["completed"], stats["pending"]) == (1, 1, 0)
+
+
+def test_prefetch_gives_way_to_user_requests(pages):
+    async def run():
+        prefetcher = Prefetcher(enabled=True, max_pending=1)
+        prefetch.browser_pool.waiting = 1
+        prefetcher.schedule_next_page(Filters(), 10, 10)
+        prefetch.browser_pool.waiting = 0
+        prefetcher.schedule_next_page(Filters(), 10, 20)
+        prefetcher.schedule_next_page(Filters(), 10, 30)
+        await asyncio.sleep(0.01)
+        return prefetcher.stats()
+
+    stats = asyncio.run(run())
+    assert [offset for offset, _ in pages] == [20]
+    assert stats["dropped"] == 2
+
+
+def test_disabled_or_floors_searches_are_not_prefetched(pages):
+    async def run():
+        Prefetcher(enabled=False).schedule_next_page(Filters(), 10, 10)
+        Prefetcher(enabled=True).schedule_next_page(Filters(is_floors_search=True), 10, 10)
+        await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert pages == []
+
+
+def test_failed_prefetch_is_counted(pages):
+    async def run():
+        prefetcher = Prefetcher(enabled=True)
+        prefetcher.schedule_next_page(Filters(), 10, -1)
+        await asyncio.sleep(0.01)
+        return prefetcher.stats()
+
+    stats = asyncio.run(run())
+    assert (stats["failed"], stats["completed"]) == (1, 0)
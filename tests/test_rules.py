@@ -0,0 +1,68 @@
+import pytest
+
+from app.rules import RuleParser
+
+
+@pytest.fixture(scope="module")
+def parser() -> RuleParser:
+    return RuleParser()
+
+
+def parsed(parser: RuleParser, sentence: str) -> dict | None:
+    filters = parser.parse(sentence)
+    return None if filters is None else filters.model_dump(exclude_defaults=True)
+
+
+@pytest.mark.parametrize("sentence, expected", [
+    ("sofas under 1.000 euro", {"price_max": 1000}),
+    ("sofas under 1,000 euro", {"price_max": 1000}),
+    ("sofas over 1.500,50 €", {"price_min": 1500}),
+    ("sofas under 12,50 €", {"price_max": 12}),
+    ("sofas between 1.000 and 2.000 euro", {"price_min": 1000, "price_max": 2000}),
+    ("sofas 200-400 €", {"price_min": 200, "price_max": 400}),
+    ("sofas at least 300 euros", {"price_min": 300}),
+    ("sofas 500 € or less", {"price_max": 500}),
+    ("sofas cheaper than 300", {"price_max": 300}),
+    ("sofas with a price under 500", {"price_max": 500}),
+    ("sofas with a budget of up to 700", {"price_max": 700}),
+])
+def test_prices(parser, sentence, expected):
+    assert parsed(parser, sentence) == {**expected, "category": "sofa-couch"}
+
+
+@pytest.mark.parametrize("sentence", ["sofa from 2019", "sofas under 500", "sofas for over 4 people"])
+def test_bare_numbers_are_left_to_the_llm(parser, sentence):
+    assert parser.parse(sentence) is None
+
+
+def test_dimensions_colors_and_prices_combine(parser):
+    assert parsed(parser, "green sofas wider than 2 m under 800 euro") == {
+        "width_min": 200, "price_max": 800, "color": "green", "category": "sofa-couch",
+    }
+
+
+def test_dimension_units_are_converted_to_cm(parser):
+    assert parsed(parser, "sofas with a depth of at most 900 mm")["depth_max"] == 90
+    assert parsed(parser, "sofas width between 1,5 and 2 m") == {"width_min": 150, "width_max": 200, "category": "sofa-couch"}
+
+
+def test_sorts_and_ratings(parser):
+    assert parsed(parser, "cheapest sofas rated 4 stars or more") == {
+        "prices_low_to_high": True, "average_rating": 4, "category": "sofa-couch",
+    }
+
+
+@pytest.mark.parametrize("sentence", [
+    "comfortable sofas for my grandmother",
+    "red or blue sofas",
+    "cheapest and most expensive sofas",
+])
+def test_unclear_sentences_go_to_the_llm(parser, sentence):
+    assert parser.parse(sentence) is None
+
+
+def test_hits_and_misses_are_counted():
+    parser = RuleParser()
+    parser.parse("sofas under 500 €")
+    parser.parse("sofas I can sleep on")
+    assert parser.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+import pytest
+
+from app.fetchers import BlockPage, ServerError
+from app.scheduler import BACKGROUND, USER, CircuitBreaker, CircuitOpen, FetchScheduler, PrioritySemaphore, TokenBucket
+
+
+def scheduler(**options) -> FetchScheduler:
+    defaults = dict(
+        concurrency=2, host_rate=1000, host_burst=10, retries=2, backoff=0, circuit_threshold=2,
+        circuit_cooldown=60, retry_on=(ServerError,), block_on=(BlockPage,),
+    )
+    return FetchScheduler(**{**defaults, **options})
+
+
+def test_token_bucket_allows_a_burst_then_waits():
+    async def take(count: int) -> float:
+        bucket = TokenBucket(rate=50, burst=2)
+        start = time.monotonic()
+        for _ in range(count):
+            await bucket.take()
+        return time.monotonic() - start
+
+    assert asyncio.run(take(2)) < 0.01
+    assert asyncio.run(take(3)) >= 0.015
+
+
+def test_circuit_breaker_opens_and_lets_one_trial_through():
+    breaker = CircuitBreaker(threshold=2, cooldown=0.02)
+    breaker.record_block()
+    assert breaker.allow()
+
+    breaker.record_block()
+    assert breaker.is_open and not breaker.allow()
+
+    time.sleep(0.03)
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert not breaker.is_open and breaker.allow()
+
+
+def test_retryable_errors_are_retried():
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ServerError(503)
+        return "ok"
+
+    fetch = scheduler()
+    assert asyncio.run(fetch.run("https://www.home24.de/graphql", operation)) == "ok"
+    assert len(calls) == 3
+    assert fetch.stats()["retried"] == 2
+
+
+def test_block_pages_are_not_retried_and_open_the_circuit():
+    calls = []
+
+    async def operation():
+        calls.append(1)
+        raise BlockPage("status: 403")
+
+    async def run(fetch: FetchScheduler):
+        for _ in range(2):
+            with pytest.raises(BlockPage):
+                await fetch.run("https://www.home24.de/produkt/a", operation)
+        with pytest.raises(CircuitOpen):
+            await fetch.run("https://www.home24.de/graphql", operation)
+        # Other hosts keep their own breaker
+        with pytest.raises(BlockPage):
+            await fetch.run("https://www.hornbach.de/p/a", operation)
+
+    fetch = scheduler()
+    asyncio.run(run(fetch))
+    assert len(calls) == 3
+    assert fetch.stats()["retried"] == 0
+    assert fetch.stats()["open_circuits"] == 1
+
+
+def test_priority_semaphore_wakes_user_requests_first():
+    order = []
+
+    async def waiter(semaphore: PrioritySemaphore, priority: int, name: str):
+        await semaphore.acquire(priority)
+        order.append(name)
+        semaphore.release()
+
+    async def run():
+        semaphore = PrioritySemaphore(1)
+        await semaphore.acquire()
+        tasks = [
+            asyncio.create_task(waiter(semaphore, BACKGROUND, "prefetch")),
+            asyncio.create_task(waiter(semaphore, USER, "user")),
+        ]
+        await asyncio.sleep(0)
+        semaphore.release()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
+    assert order == ["user", "prefetch"]
@@ -0,0 +1,37 @@
+import asyncio
+
+from app.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+
+    async def operation():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", operation) for _ in range(5)))
+
+    assert asyncio.run(run()) == [1] * 5
+    assert flight.stats() == {"in_flight": 0, "executed": 1, "shared": 4}
+
+
+def test_a_cancelled_caller_does_not_cancel_the_others():
+    flight = SingleFlight()
+
+    async def operation():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        first = asyncio.create_task(flight.do("key", operation))
+        second = asyncio.create_task(flight.do("key", operation))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "done"
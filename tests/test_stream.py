@@ -0,0 +1,52 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.models import Filters
+
+
+EVENTS = [("product", 0, {"name": "Sofa"}), ("product", 1, {"name": "Sessel"}), ("details", 0, {"color": "Grau"})]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def get_filters_from_sentence(sentence: str) -> Filters:
+        return Filters()
+
+    async def iter_product_list(filters, limit, offset, fields, deadline):
+        for event in EVENTS:
+            yield event
+
+    monkeypatch.setattr(main, "get_filters_from_sentence", get_filters_from_sentence)
+    monkeypatch.setattr(main, "iter_product_list", iter_product_list)
+    return TestClient(main.app)
+
+
+def test_ndjson_is_one_message_per_line(client):
+    response = client.post("/get/stream?limit=2", json={"sentence": "sofa"})
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.text.endswith("\n")
+    messages = [json.loads(line) for line in response.text.splitlines()]
+    assert [(m["event"], m["index"], m["data"]) for m in messages[:3]] == EVENTS
+    # As many products as the limit, the end event points to the next page
+    assert messages[3]["event"] == "end" and messages[3]["data"]["next_cursor"]
+
+
+def test_sse_frames_carry_the_event_name(client):
+    response = client.post("/get/stream", json={"sentence": "sofa"}, headers={"Accept": "text/event-stream"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames = response.text.split("\n\n")
+    assert frames[-1] == ""
+    events = []
+    for frame in frames[:-1]:
+        event, data = frame.split("\n")
+        assert event.startswith("event: ") and data.startswith("data: ")
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    assert [name for name, _ in events] == ["product", "product", "details", "end"]
+    assert all(name == message["event"] for name, message in events)
+    # Fewer products than the limit, there is no next page
+    assert events[-1][1]["data"] == {"next_cursor": None}
@@ -0,0 +1,58 @@
+import asyncio
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from app.parsing import parse_product_page
+from app.workers import ParsePool
+
+
+DETAILS = Path(__file__).parent.parent / "benchmarks" / "fixtures" / "details"
+
+
+class BrokenExecutor:
+    """Stands in for a pool whose worker died, every submit fails"""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+def test_workers_parse_like_the_inline_parser():
+    pages = [path.read_text() for path in sorted(DETAILS.glob("*.html"))]
+
+    async def parse():
+        pool = ParsePool(2)
+        await pool.start()
+        try:
+            return await asyncio.gather(*(pool.parse(html) for html in pages)), pool.stats()
+        finally:
+            await pool.close()
+
+    details, stats = asyncio.run(parse())
+    assert details == [parse_product_page(html) for html in pages]
+    assert (stats["parsed"], stats["inline"], stats["pending"]) == (len(pages), 0, 0)
+
+
+def test_broken_pool_is_replaced_and_the_page_parsed_inline():
+    html = (DETAILS / "sofa-jenny.html").read_text()
+
+    async def parse():
+        pool = ParsePool(1)
+        pool._executor = BrokenExecutor()
+        try:
+            details = await pool.parse(html)
+            replaced = pool._executor
+            return details, pool.stats(), replaced
+        finally:
+            await pool.close()
+
+    details, stats, replaced = asyncio.run(parse())
+    assert details == parse_product_page(html)
+    assert (stats["restarts"], stats["inline"], stats["workers"]) == (1, 1, 1)
+    assert not isinstance(replaced, BrokenExecutor)
+